@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+Archive the source PDFs and derived artifacts (mapping, paper JSON,
+generated SQL) to a private storage bucket with resumable uploads.
+- TUS protocol (/storage/v1/upload/resumable): each file is created
+  once and sent in CHUNK_SIZE PATCHes; the upload URL and confirmed byte
+  offset are checkpointed, so a rerun asks the server for its offset
+  (HEAD) and continues from there instead of from zero
+- when the server offers the concatenation extension, large files are
+  split into parts uploaded in parallel and joined server-side;
+  otherwise chunks go in order (Supabase) and files run in parallel
+- SHA-256 of every file is taken before upload, sent as metadata and
+  recorded in archive/manifest.json, which is re-pushed (with retries)
+  whenever the remote copy is missing or differs; --verify downloads and re-hashes;
+  per-chunk SHA-1 checksums are sent when the server supports them
+- unchanged files (same size, mtime and hash) are skipped
+
+  python3 scripts/archive_upload.py
+  python3 scripts/archive_upload.py --verify
+  NEXT_PUBLIC_SUPABASE_URL=http://127.0.0.1:54321 python3 scripts/archive_upload.py   # local_supabase.py
+"""
+
+import argparse
+import base64
+import glob
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from pdf_to_images import PDF_DIR, PDF_RULES
+from upload_images import SUPABASE_URL, WORKERS, make_session
+
+BUCKET = "paper-archive"  # private: not served through public URLs
+TUS_URL = f"{SUPABASE_URL}/storage/v1/upload/resumable"
+STATE_FILE = "data/.archive_state.json"  # object -> {sha256, size, mtime_ns, upload_url(s), done}
+MANIFEST_OBJECT = "archive/manifest.json"
+
+CHUNK_SIZE = 6 * 1024 * 1024  # Supabase requires 6 MB chunks (last one may be shorter)
+PART_SIZE = 4 * CHUNK_SIZE  # per parallel part, when concatenation is available
+MAX_ATTEMPTS = 5
+
+ARTIFACT_GLOBS = [
+    "data/pastpaper_papers.json",
+    "data/paper_page_mapping.json",
+    "data/page_mapping_template.json",
+    "data/missing_papers_template.json",
+    "data/crop_boxes.json",
+    "data/*.sql",
+    "data/mcp_stmts/*.sql",
+]
+
+
+def archive_files():
+    """[(local path, object name)] for source PDFs and artifacts that exist."""
+    files = []
+    for pdf_name in PDF_RULES:
+        path = os.path.join(PDF_DIR, pdf_name)
+        if os.path.exists(path):
+            files.append((path, f"sources/{pdf_name}"))
+    for pattern in ARTIFACT_GLOBS:
+        for path in sorted(glob.glob(pattern)):
+            files.append((path, f"artifacts/{os.path.relpath(path, 'data')}"))
+    return files
+
+
+def file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def encode_metadata(meta):
+    return ",".join(f"{k} {base64.b64encode(str(v).encode('utf-8')).decode()}" for k, v in meta.items())
+
+
+class Tus:
+    """Minimal TUS 1.0 client over the pooled session."""
+
+    def __init__(self, session):
+        self.session = session
+        self.headers = {"Tus-Resumable": "1.0.0"}
+        r = session.options(TUS_URL, headers=self.headers, timeout=15)
+        extensions = set(r.headers.get("Tus-Extension", "").split(","))
+        self.concat = "concatenation" in extensions
+        self.checksum = "checksum" in extensions and "sha1" in r.headers.get("Tus-Checksum-Algorithm", "sha1")
+
+    def create(self, length, meta=None, partial=False, final_of=None):
+        headers = {**self.headers, "x-upsert": "true"}
+        if meta:
+            headers["Upload-Metadata"] = encode_metadata(meta)
+        if final_of:
+            headers["Upload-Concat"] = "final;" + " ".join(final_of)
+        else:
+            headers["Upload-Length"] = str(length)
+            if partial:
+                headers["Upload-Concat"] = "partial"
+        r = self.session.post(TUS_URL, headers=headers, timeout=30)
+        if r.status_code != 201:
+            raise RuntimeError(f"create: HTTP {r.status_code} {r.text[:200]}")
+        return r.headers["Location"]
+
+    def offset(self, url):
+        """Server's confirmed offset for an upload, or None if it no longer exists."""
+        r = self.session.head(url, headers=self.headers, timeout=15)
+        if r.status_code in (404, 410):
+            return None
+        if r.status_code != 200:
+            raise RuntimeError(f"head: HTTP {r.status_code}")
+        return int(r.headers["Upload-Offset"])
+
+    def send(self, url, path, start, end, progress):
+        """PATCH bytes [start, end) of path to url, resuming at the server's offset."""
+        offset, attempts = self.offset(url), 0
+        if offset is None:
+            raise LookupError(url)
+        with open(path, "rb") as f:
+            while start + offset < end:
+                f.seek(start + offset)
+                chunk = f.read(min(CHUNK_SIZE, end - start - offset))
+                headers = {**self.headers, "Upload-Offset": str(offset),
+                           "Content-Type": "application/offset+octet-stream"}
+                if self.checksum:
+                    headers["Upload-Checksum"] = "sha1 " + base64.b64encode(hashlib.sha1(chunk).digest()).decode()
+                try:
+                    r = self.session.patch(url, headers=headers, data=chunk, timeout=120)
+                    ok = r.status_code == 204
+                except Exception:
+                    ok = False
+                if ok:
+                    offset = int(r.headers["Upload-Offset"])
+                    progress(len(chunk))
+                    attempts = 0
+                    continue
+                attempts += 1
+                if attempts >= MAX_ATTEMPTS:
+                    raise RuntimeError(f"patch at {offset}: giving up after {attempts} attempts")
+                time.sleep(min(30, 2 ** attempts))
+                offset = self.offset(url)  # re-sync: the server may have kept part of the chunk
+                if offset is None:
+                    raise LookupError(url)
+
+
+class Checkpoint:
+    def __init__(self, path=STATE_FILE):
+        self.path = path
+        self.lock = threading.Lock()
+        self.state = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                self.state = json.load(f)
+
+    def get(self, name):
+        with self.lock:
+            return dict(self.state.get(name, {}))
+
+    def update(self, name, **fields):
+        with self.lock:
+            self.state.setdefault(name, {}).update(fields)
+            tmp = self.path + ".tmp"
+            with open(tmp, "w") as f:
+                json.dump(self.state, f, indent=1)
+            os.replace(tmp, self.path)
+
+
+def upload_file(tus, checkpoint, path, name, progress):
+    """Upload one file resumably. Returns (name, status, detail)."""
+    st = os.stat(path)
+    entry = checkpoint.get(name)
+    if entry.get("size") == st.st_size and entry.get("mtime_ns") == st.st_mtime_ns and entry.get("sha256"):
+        digest = entry["sha256"]
+    else:
+        digest = file_sha256(path)
+    if entry.get("done") and entry.get("sha256") == digest:
+        return name, "unchanged", ""
+    if entry.get("sha256") != digest:
+        entry = {}  # content changed: the old upload session is useless
+    checkpoint.update(name, sha256=digest, size=st.st_size, mtime_ns=st.st_mtime_ns, done=False)
+
+    meta = {"bucketName": BUCKET, "objectName": name, "contentType": "application/octet-stream",
+            "sha256": digest}
+    size = st.st_size
+    try:
+        if tus.concat and size > PART_SIZE:
+            ranges = [(s, min(s + PART_SIZE, size)) for s in range(0, size, PART_SIZE)]
+            urls = entry.get("part_urls") or []
+            if len(urls) != len(ranges):
+                urls = [tus.create(e - s, partial=True) for s, e in ranges]
+                checkpoint.update(name, part_urls=urls)
+            with ThreadPoolExecutor(max_workers=min(len(ranges), WORKERS)) as parts:
+                list(parts.map(lambda i: tus.send(urls[i], path, *ranges[i], progress), range(len(ranges))))
+            tus.create(size, meta, final_of=urls)
+        else:
+            url = entry.get("upload_url")
+            if not url or tus.offset(url) is None:
+                url = tus.create(size, meta)
+                checkpoint.update(name, upload_url=url)
+            tus.send(url, path, 0, size, progress)
+    except LookupError:
+        # Upload session expired server-side: forget it, next run starts this file over
+        checkpoint.update(name, upload_url=None, part_urls=None)
+        return name, "failed", "upload session expired, rerun to restart"
+    except Exception as e:
+        return name, "failed", str(e)
+    checkpoint.update(name, done=True, upload_url=None, part_urls=None)
+    return name, "uploaded", f"{size / 1024 / 1024:.1f} MB"
+
+
+def push_manifest(session, checkpoint):
+    """Upload the manifest unless the remote copy already matches. Returns a status string."""
+    manifest = {name: {"sha256": e["sha256"], "size": e["size"]}
+                for name, e in sorted(checkpoint.state.items()) if e.get("done")}
+    body = json.dumps(manifest, indent=1).encode("utf-8")
+    url = f"{SUPABASE_URL}/storage/v1/object/{BUCKET}/{MANIFEST_OBJECT}"
+    try:
+        r = session.get(url, timeout=30)
+        if r.status_code == 200 and r.content == body:
+            return "unchanged"
+    except Exception:
+        pass  # treat as missing
+    status = "no response"
+    for attempt in range(MAX_ATTEMPTS):
+        try:
+            r = session.post(url, headers={"Content-Type": "application/json", "x-upsert": "true"},
+                             data=body, timeout=30)
+            if r.status_code in (200, 201):
+                return "ok"
+            status = f"HTTP {r.status_code}"
+        except Exception as e:
+            status = str(e)
+        time.sleep(min(30, 2 ** attempt))
+    return f"failed ({status}), rerun to retry"
+
+
+def verify(session, checkpoint):
+    """Download archived objects and compare their SHA-256 with the recorded one."""
+    bad = []
+    for name, entry in sorted(checkpoint.state.items()):
+        if not entry.get("done"):
+            continue
+        r = session.get(f"{SUPABASE_URL}/storage/v1/object/{BUCKET}/{name}", timeout=300)
+        if r.status_code != 200 or hashlib.sha256(r.content).hexdigest() != entry["sha256"]:
+            bad.append((name, r.status_code))
+    return bad
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Resumable archive upload of source PDFs and artifacts")
+    ap.add_argument("--workers", type=int, default=WORKERS, help="files uploaded in parallel")
+    ap.add_argument("--verify", action="store_true", help="download and re-hash archived objects")
+    args = ap.parse_args()
+
+    # files in parallel, each with up to WORKERS parallel parts
+    session = make_session(pool_size=args.workers * WORKERS)
+    checkpoint = Checkpoint()
+    if args.verify:
+        bad = verify(session, checkpoint)
+        done = sum(1 for e in checkpoint.state.values() if e.get("done"))
+        print(f"Verified {done - len(bad)}/{done} objects")
+        for name, status in bad:
+            print(f"  BAD {name} (HTTP {status})")
+        return
+
+    files = archive_files()
+    total = sum(os.path.getsize(p) for p, _ in files)
+    tus = Tus(session)
+    print(f"{len(files)} files, {total / 1024 / 1024:.1f} MB -> {BUCKET} "
+          f"({'parallel parts' if tus.concat else 'sequential chunks'}"
+          f"{', chunk checksums' if tus.checksum else ''})")
+
+    sent = [0]
+    lock = threading.Lock()
+
+    def progress(n):
+        with lock:
+            sent[0] += n
+
+    t0 = time.perf_counter()
+    results = {"uploaded": [], "unchanged": [], "failed": []}
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        for name, status, detail in pool.map(lambda f: upload_file(tus, checkpoint, f[0], f[1], progress), files):
+            results[status].append(name)
+            if status != "unchanged":
+                print(f"  {status.upper():<9} {name}  {detail}")
+    secs = time.perf_counter() - t0
+    print(f"\n{len(results['uploaded'])} uploaded, {len(results['unchanged'])} unchanged, "
+          f"{len(results['failed'])} failed; {sent[0] / 1024 / 1024:.1f} MB sent in {secs:.1f}s")
+
+    print(f"Manifest: {MANIFEST_OBJECT} ({push_manifest(session, checkpoint)})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Build one cacheable asset bundle per paper (run after generate_mapping.py).
+Each bundle holds the paper text (compact JSON) and its page images, plus
+width/height/blurhash placeholders so the client can lay out pages before
+any pixels arrive. Bundles get content-hashed names and are listed in
+index.json; unchanged papers are not rewritten.
+
+Bundle layout (big-endian):
+  b"DSB1" | uint32 header_len | header JSON (utf-8) | page bytes...
+  header = {"paper": {...}, "pages": [{"offset", "length", "type",
+            "width", "height", "blurhash", "sha256"}]}   offsets are relative to
+  the first byte after the header.
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import struct
+
+from sources import in_expected_folder
+
+PAPERS_JSON = "data/pastpaper_papers.json"
+MAPPING_FILE = "data/paper_page_mapping.json"
+IMAGES_DIR = "data/images"
+OUTPUT_DIR = "public/paper-bundles"
+INDEX_FILE = os.path.join(OUTPUT_DIR, "index.json")
+URL_PREFIX = "/paper-bundles"
+
+MAGIC = b"DSB1"
+BLURHASH_COMPONENTS = (4, 5)  # x, y: pages are portrait
+BLURHASH_SAMPLE_WIDTH = 32  # downscale before encoding, blurhash only needs a few pixels
+
+PAPER_FIELDS = [
+    "id", "paper_id", "year", "paper_number", "topic", "part_a_title",
+    "part_a_source", "part_a_article", "part_a_discussion_points", "part_b_questions",
+]
+
+BASE83 = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz#$%*+,-.:;=?@[]^_{|}~"
+
+
+def base83(value, length):
+    return "".join(BASE83[(value // 83 ** (length - i - 1)) % 83] for i in range(length))
+
+
+def srgb_to_linear(v):
+    v = v / 255
+    return v / 12.92 if v <= 0.04045 else ((v + 0.055) / 1.055) ** 2.4
+
+
+def linear_to_srgb(v):
+    v = max(0.0, min(1.0, v))
+    if v <= 0.0031308:
+        return int(v * 12.92 * 255 + 0.5)
+    return int((1.055 * v ** (1 / 2.4) - 0.055) * 255 + 0.5)
+
+
+def sign_pow(v, exp):
+    return math.copysign(abs(v) ** exp, v)
+
+
+def blurhash(pixels, width, height, cx, cy):
+    """Encode row-major RGB pixels as a blurhash string."""
+    lin = [tuple(srgb_to_linear(c) for c in px) for px in pixels]
+    cos_x = [[math.cos(math.pi * i * x / width) for x in range(width)] for i in range(cx)]
+    cos_y = [[math.cos(math.pi * j * y / height) for y in range(height)] for j in range(cy)]
+
+    factors = []
+    for j in range(cy):
+        for i in range(cx):
+            norm = 1 if i == 0 and j == 0 else 2
+            r = g = b = 0.0
+            for y in range(height):
+                row = y * width
+                wy = cos_y[j][y]
+                for x in range(width):
+                    basis = wy * cos_x[i][x]
+                    pr, pg, pb = lin[row + x]
+                    r += basis * pr
+                    g += basis * pg
+                    b += basis * pb
+            scale = norm / (width * height)
+            factors.append((r * scale, g * scale, b * scale))
+
+    dc, ac = factors[0], factors[1:]
+    out = base83((cx - 1) + (cy - 1) * 9, 1)
+    if ac:
+        actual_max = max(abs(v) for f in ac for v in f)
+        quant_max = max(0, min(82, int(actual_max * 166 - 0.5)))
+        max_val = (quant_max + 1) / 166
+        out += base83(quant_max, 1)
+    else:
+        max_val = 1
+        out += base83(0, 1)
+    out += base83((linear_to_srgb(dc[0]) << 16) + (linear_to_srgb(dc[1]) << 8) + linear_to_srgb(dc[2]), 4)
+    for f in ac:
+        q = [max(0, min(18, int(sign_pow(v / max_val, 0.5) * 9 + 9.5))) for v in f]
+        out += base83(q[0] * 19 * 19 + q[1] * 19 + q[2], 2)
+    return out
+
+
+def page_meta(data):
+    """Return (width, height, blurhash) for encoded image bytes."""
+    from PIL import Image
+    import io
+
+    img = Image.open(io.BytesIO(data))
+    width, height = img.size
+    sw = BLURHASH_SAMPLE_WIDTH
+    sh = max(1, round(height * sw / width))
+    small = img.convert("RGB").resize((sw, sh))
+    return width, height, blurhash(list(small.getdata()), sw, sh, *BLURHASH_COMPONENTS)
+
+
+def pack_bundle(paper, images, meta_cache):
+    """Return bundle bytes for a paper and its list of image paths."""
+    blobs, pages, offset = [], [], 0
+    for rel in images:
+        with open(os.path.join(IMAGES_DIR, rel), "rb") as f:
+            data = f.read()
+        digest = hashlib.sha256(data).hexdigest()
+        if digest not in meta_cache:
+            meta_cache[digest] = page_meta(data)
+        width, height, bh = meta_cache[digest]
+        pages.append({
+            "offset": offset, "length": len(data), "type": "image/webp",
+            "width": width, "height": height, "blurhash": bh, "sha256": digest,
+        })
+        blobs.append(data)
+        offset += len(data)
+
+    header = {"paper": {k: paper.get(k) for k in PAPER_FIELDS}, "pages": pages}
+    raw = json.dumps(header, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return MAGIC + struct.pack(">I", len(raw)) + raw + b"".join(blobs), pages
+
+
+def main():
+    argparse.ArgumentParser(description="Build per-paper asset bundles into public/paper-bundles").parse_args()
+
+    with open(PAPERS_JSON) as f:
+        papers = {p["paper_id"]: p for p in json.load(f)}
+    with open(MAPPING_FILE) as f:
+        mapping = json.load(f)
+
+    # paper_id -> ordered images, dropping entries that point at another folder
+    by_pid = {}
+    for e in mapping:
+        pid, img = e["paper_id"], e["image"]
+        if not in_expected_folder(pid, img):
+            continue
+        imgs = by_pid.setdefault(pid, [])
+        if img not in imgs:
+            imgs.append(img)
+
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    index = {}
+    if os.path.exists(INDEX_FILE):
+        with open(INDEX_FILE) as f:
+            index = json.load(f)
+    meta_cache = {
+        page["sha256"]: (page["width"], page["height"], page["blurhash"])
+        for entry in index.values() for page in entry.get("pages", []) if "sha256" in page
+    }
+
+    written = reused = 0
+    new_index = {}
+    for pid in sorted(by_pid):
+        paper = papers.get(pid)
+        if not paper:
+            print(f"  SKIP {pid}: not in {PAPERS_JSON}")
+            continue
+        bundle, pages = pack_bundle(paper, by_pid[pid], meta_cache)
+        digest = hashlib.sha256(bundle).hexdigest()[:12]
+        name = f"{pid}.{digest}.bundle"
+        path = os.path.join(OUTPUT_DIR, name)
+        if os.path.exists(path):
+            reused += 1
+        else:
+            with open(path, "wb") as f:
+                f.write(bundle)
+            written += 1
+        old = index.get(pid)
+        if old and old["file"] != name:
+            stale = os.path.join(OUTPUT_DIR, old["file"])
+            if os.path.exists(stale):
+                os.remove(stale)
+
+        new_index[pid] = {
+            "file": name,
+            "url": f"{URL_PREFIX}/{name}",
+            "bytes": len(bundle),
+            "pages": [
+                {k: page[k] for k in ("width", "height", "blurhash", "sha256")} for page in pages
+            ],
+        }
+
+    for pid, old in index.items():
+        if pid not in new_index:
+            stale = os.path.join(OUTPUT_DIR, old["file"])
+            if os.path.exists(stale):
+                os.remove(stale)
+
+    with open(INDEX_FILE, "w", encoding="utf-8") as f:
+        json.dump(new_index, f, indent=2, ensure_ascii=False)
+
+    total = sum(e["bytes"] for e in new_index.values())
+    print(f"\nDone! {len(new_index)} bundles ({written} written, {reused} unchanged), "
+          f"{total / 1024 / 1024:.1f} MB total.")
+    print(f"Index: {INDEX_FILE}")
+
+
+if __name__ == "__main__":
+    main()
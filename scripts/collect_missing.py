@@ -1,7 +1,9 @@
 #!/usr/bin/env python3
 """
 Collect all PDF page images that exist in the converted images but
-have NO corresponding entry in the database.
+have NO corresponding entry in the database: "missing" slots, plus
+"orphaned" pages beyond an ordered folder's DB papers (labelled by
+their position in the X.1, X.2, X.3 sequence and marked as such).
 Outputs:
   1. A combined PDF with all missing pages (labeled)
   2. A JSON template file for the user to fill in
@@ -9,49 +11,11 @@ Outputs:
 
 import json
 import os
-import math
-from collections import defaultdict
-
-PAPERS_JSON = "/Users/randy/dsespeakingweb/data/pastpaper_papers.json"
-IMAGES_DIR = "/Users/randy/dsespeakingweb/data/images"
-OUTPUT_PDF = "/Users/randy/dsespeakingweb/data/missing_papers.pdf"
-OUTPUT_JSON = "/Users/randy/dsespeakingweb/data/missing_papers_template.json"
-
-YEAR_KEYS = {
-    2012: "2012",
-    2013: "2013",
-    2014: "2014",
-    2015: "2015",
-    2016: "2016",
-    2017: "2017",
-    2018: "2018",
-    2019: "2019",
-    2023: "2023",
-}
-
-# Also include image-only folders (no DB data at all)
-IMAGE_ONLY_FOLDERS = {
-    "2012-practice": {"year": 2012, "prefix": "2012practice"},
-    "2012-sample": {"year": 2012, "prefix": "2012sample"},
-    "2024": {"year": 2024, "prefix": "2024"},
-    "2025": {"year": 2025, "prefix": "2025"},
-}
-
-
-def sort_key(p):
-    parts = p["paper_number"].split(".")
-    return (float(parts[0]), float(parts[1]) if len(parts) > 1 else 0)
-
-
-def generate_full_sequence(num_images):
-    num_groups = math.ceil(num_images / 3)
-    seq = []
-    for g in range(1, num_groups + 1):
-        for s in range(1, 4):
-            seq.append(f"{g}.{s}")
-            if len(seq) == num_images:
-                return seq
-    return seq
+
+from page_coverage import IMAGES_DIR, PAGE_RE, generate_full_sequence, load_coverage
+
+OUTPUT_PDF = "data/missing_papers.pdf"
+OUTPUT_JSON = "data/missing_papers_template.json"
 
 
 def main():
@@ -64,65 +28,44 @@ def main():
     from PIL import Image
     import io
 
-    with open(PAPERS_JSON) as f:
-        papers = json.load(f)
-
-    by_year = defaultdict(list)
-    for p in papers:
-        by_year[p["year"]].append(p)
-
-    missing = []  # list of (label, image_path)
-
-    # --- Check years that have DB entries but some papers missing ---
-    for year in sorted(YEAR_KEYS.keys()):
-        key = YEAR_KEYS[year]
-        img_path = os.path.join(IMAGES_DIR, key)
-        if not os.path.exists(img_path):
-            continue
-
-        imgs = sorted([f for f in os.listdir(img_path) if f.endswith(".webp")])
-        year_papers = by_year.get(year, [])
-
-        paper_lookup = {p["paper_number"]: p for p in year_papers}
-        full_seq = generate_full_sequence(len(imgs))
-
-        for i, paper_num in enumerate(full_seq):
-            if i >= len(imgs):
-                break
-            if paper_num not in paper_lookup:
-                abs_path = os.path.join(img_path, imgs[i])
-                label = f"{year}-{paper_num}"
-                missing.append((label, abs_path, year, paper_num))
-
-    # --- Check image-only folders (no DB data) ---
-    for folder, info in sorted(IMAGE_ONLY_FOLDERS.items()):
-        img_path = os.path.join(IMAGES_DIR, folder)
-        if not os.path.exists(img_path):
-            continue
-
-        imgs = sorted([f for f in os.listdir(img_path) if f.endswith(".webp")])
-        full_seq = generate_full_sequence(len(imgs))
-
-        for i, paper_num in enumerate(full_seq):
-            if i >= len(imgs):
-                break
-            abs_path = os.path.join(img_path, imgs[i])
-            label = f"{info['prefix']}-{paper_num}"
-            missing.append((label, abs_path, info["year"], paper_num))
-
-    if not missing:
+    # Reuse the single-pass scan from page_coverage.py
+    coverage = load_coverage()
+
+    missing = []  # list of (label, image_path, year, paper_num)
+    for rec in coverage["index"]:
+        if rec["status"] == "missing":
+            abs_path = os.path.join(IMAGES_DIR, rec["image"])
+            missing.append((rec["paper_id"], abs_path, rec["year"], rec["paper_number"]))
+
+    orphaned = []  # same shape; paper_num guessed from the page's position
+    for folder, entry in sorted(coverage["folders"].items()):
+        for image in entry.get("orphaned", []):
+            m = PAGE_RE.match(image.split("/", 1)[1])
+            if "prefix" not in entry or not m:
+                print(f"  SKIP {image}: not a page of a known folder")
+                continue
+            paper_num = generate_full_sequence(int(m.group(1)))[-1]
+            orphaned.append((f"{entry['prefix']}-{paper_num}", os.path.join(IMAGES_DIR, image),
+                             entry["year"], paper_num))
+
+    if not missing and not orphaned:
         print("No missing papers found!")
         return
 
     print(f"Found {len(missing)} missing papers:")
     for label, path, year, pn in missing:
         print(f"  {label}")
+    if orphaned:
+        print(f"Found {len(orphaned)} orphaned pages (beyond the folder's DB papers):")
+        for label, path, year, pn in orphaned:
+            print(f"  {label}  ({os.path.relpath(path, IMAGES_DIR)})")
 
     # --- Generate combined PDF using Pillow ---
     from PIL import ImageDraw, ImageFont
 
     pdf_pages = []
-    for label, img_path, year, paper_num in missing:
+    for label, img_path, year, paper_num in missing + orphaned:
+        kind = "MISSING" if (label, img_path, year, paper_num) in missing else "ORPHANED"
         img = Image.open(img_path).convert("RGB")
         w, h = img.size
 
@@ -136,7 +79,7 @@ def main():
             font = ImageFont.truetype("/System/Library/Fonts/Helvetica.ttc", 36)
         except:
             font = ImageFont.load_default()
-        draw.text((20, 10), f"MISSING: {label}", fill=(0, 0, 0), font=font)
+        draw.text((20, 10), f"{kind}: {label}", fill=(0, 0, 0), font=font)
 
         pdf_pages.append(new_img)
 
@@ -149,7 +92,7 @@ def main():
 
     # --- Generate JSON template ---
     template = []
-    for label, img_path, year, paper_num in missing:
+    for label, img_path, year, paper_num in missing + orphaned:
         template.append({
             "year": year,
             "paper_number": paper_num,
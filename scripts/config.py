@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+"""
+Shared settings lookup for the scripts: environment first, then
+.env.local at the repo root. The file is parsed once per process.
+"""
+
+import os
+from functools import lru_cache
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+ENV_FILE = os.path.join(ROOT, ".env.local")
+
+
+@lru_cache(maxsize=None)
+def env_file():
+    values = {}
+    if os.path.exists(ENV_FILE):
+        with open(ENV_FILE) as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith("#") or "=" not in line:
+                    continue
+                k, v = line.split("=", 1)
+                values[k.strip()] = v.strip().strip('"')
+    return values
+
+
+def get(name, default=""):
+    return os.environ.get(name) or env_file().get(name, default)
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Single entry point for the paper pipeline scripts.
+
+  python3 scripts/dse.py <command> [args...]
+  python3 scripts/dse.py startup          # measure import/start-up cost per command (runs nothing)
+
+Each command's module is imported only when that command runs, and the
+modules themselves defer fitz / PIL / requests / tqdm to the functions
+that need them, so quick commands (map, sql, coverage) start fast.
+Commands run from the repo root, so the scripts' relative data/ paths
+resolve wherever the CLI is launched from. The source PDF folder is
+DSE_PDF_DIR (environment or .env.local).
+"""
+
+import os
+import sys
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(SCRIPTS_DIR)
+
+# command -> (module, one-line help)
+COMMANDS = {
+    "sources":  ("sources",               "exam source registry / resolve paper_id folders"),
+    "render":   ("pdf_to_images",         "convert PDFs to WebP pages (--tiles, --vector)"),
+    "map":      ("generate_mapping",      "write paper_page_mapping.json"),
+    "coverage": ("page_coverage",         "mapped / missing / orphaned pages per folder"),
+    "missing":  ("collect_missing",       "PDF + JSON template of pages missing from the DB"),
+    "preview":  ("preview_mapping",       "HTML preview of the mapping"),
+    "sql":      ("update_page_images_sql", "print page_images UPDATE statements"),
+    "import":   ("import_new_papers",     "import addpp.md into the paper JSON"),
+    "run-sql":  ("run_sql",               "execute generated SQL files against Postgres"),
+    "sync":     ("sync_papers",           "diff-based sync with pastpaper_papers"),
+    "upload":   ("upload_images",         "upload pages, thumbnails and manifests"),
+    "verify":   ("verify_images",         "check published page_images against local files"),
+    "archive":  ("archive_upload",        "resumable archive upload of PDFs and artifacts"),
+    "gc":       ("gc_storage",            "delete unreferenced objects from the bucket"),
+    "similar":  ("similar_papers",        "related / dissimilar papers by topic"),
+    "snapshot": ("export_snapshot",       "static, precompressed paper snapshot in public/"),
+    "questions": ("question_index",      "Part B question index / random draws"),
+    "bundles":  ("build_bundles",         "build per-paper asset bundles"),
+    "report":   ("image_report",          "image size/quality report with baseline gate"),
+    "cache":    ("raster_cache",          "inspect or clear the raster cache"),
+    "watch":    ("watch",                 "rebuild outputs as PDFs / addpp.md change"),
+    "stand-in": ("local_supabase",        "run the local Supabase stand-in"),
+    "loadtest": ("load_test",             "benchmark uploads/inserts against the stand-in"),
+}
+
+STARTUP_BUDGET_MS = 100
+
+
+def usage():
+    print(__doc__.strip().split("\n\n")[1])
+    print("\nCommands:")
+    for name, (_, desc) in COMMANDS.items():
+        print(f"  {name:<10} {desc}")
+    print(f"  {'startup':<10} measure import time and start-up of every command")
+
+
+def measure_startup():
+    """Import time (-X importtime) and process start-up wall time per command module.
+
+    Only the import is measured, so the numbers do not include argument
+    parsing or anything a command does once main() runs.
+    """
+    import subprocess
+    import time
+
+    print(f"{'command':<10} {'module':<24} {'import':>9} {'start-up':>9}")
+    for name, (module, _) in COMMANDS.items():
+        t0 = time.perf_counter()
+        r = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            cwd=SCRIPTS_DIR, capture_output=True, text=True,
+        )
+        wall_ms = (time.perf_counter() - t0) * 1000
+        import_us = None
+        for line in r.stderr.splitlines() if r.returncode == 0 else []:
+            parts = [p.strip() for p in line.split("|")]
+            if len(parts) == 3 and parts[2] == module:
+                import_us = int(parts[1])
+
+        imp = f"{import_us / 1000:.1f} ms" if import_us is not None else "failed"
+        flag = "  <-- over budget" if name in ("map", "sql") and wall_ms > STARTUP_BUDGET_MS else ""
+        print(f"{name:<10} {module:<24} {imp:>9} {wall_ms:>6.0f} ms{flag}")
+
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] in ("-h", "--help"):
+        usage()
+        return
+    name, rest = sys.argv[1], sys.argv[2:]
+    if name == "startup":
+        measure_startup()
+        return
+    if name not in COMMANDS:
+        print(f"Unknown command: {name}\n")
+        usage()
+        sys.exit(2)
+
+    module_name, desc = COMMANDS[name]
+    if any(a in ("-h", "--help") for a in rest) and name in ("map", "missing", "preview", "sql"):
+        # These scripts take no options; answer without importing them
+        print(f"usage: dse.py {name}\n\n{desc}")
+        return
+
+    os.chdir(ROOT)
+    sys.argv = [f"dse.py {name}"] + rest
+    import importlib
+    importlib.import_module(module_name).main()
+
+
+if __name__ == "__main__":
+    main()
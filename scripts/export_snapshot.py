@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Export a static snapshot of the paper bank into public/ so pages can read
+papers from cacheable files instead of querying pastpaper_papers.
+- one shard per year (papers-<year>.<hash>.json) with full rows, page_images
+  filled in from the mapping, ordered like the room picker (paper_number)
+- index.json: year -> shard URL plus a compact paper list
+  (id, paper_id, year, paper_number, topic) for pickers and lookups by id
+- every file is written with .gz and .br siblings (brotli if installed)
+  so the server can send precompressed bytes
+- shard names carry a content hash; unchanged years are not rewritten or
+  recompressed, and superseded shards are removed
+
+  python3 scripts/export_snapshot.py
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from paper_sql import ALL_COLUMNS
+from update_page_images_sql import group_urls
+
+PAPERS_JSON = "data/pastpaper_papers.json"
+MAPPING_FILE = "data/paper_page_mapping.json"
+OUTPUT_DIR = "public/paper-data"
+INDEX_FILE = os.path.join(OUTPUT_DIR, "index.json")
+URL_PREFIX = "/paper-data"
+
+INDEX_FIELDS = ["id", "paper_id", "year", "paper_number", "topic"]
+SNAPSHOT_VERSION = 1
+
+
+def compact(obj):
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def compressors():
+    """[(suffix, fn)] for the precompressed siblings."""
+    out = [(".gz", lambda data: gzip.compress(data, compresslevel=9, mtime=0))]
+    try:
+        import brotli
+    except ImportError:
+        print("NOTE: brotli not installed (pip install brotli), skipping .br files")
+        return out
+    out.append((".br", lambda data: brotli.compress(data, quality=11)))
+    return out
+
+
+def write_variants(path, data, codecs):
+    """Write path plus its compressed siblings. Returns {"raw" | suffix: bytes}."""
+    sizes = {"raw": len(data)}
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+    for suffix, fn in codecs:
+        packed = fn(data)
+        with open(tmp, "wb") as f:
+            f.write(packed)
+        os.replace(tmp, path + suffix)
+        sizes[suffix] = len(packed)
+    return sizes
+
+
+def remove_variants(path):
+    for suffix in ("", ".gz", ".br"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+
+def sort_key(p):
+    return tuple(int(x) for x in p["paper_number"].split(".") if x.isdigit())
+
+
+def build_shards(papers, page_images):
+    """year -> list of rows (ALL_COLUMNS order, then page_images)."""
+    shards = {}
+    for p in sorted(papers, key=lambda p: (p["year"], sort_key(p), p["paper_id"])):
+        row = {col: p.get(col) for col in ALL_COLUMNS}
+        row["page_images"] = page_images.get(p["paper_id"], [])
+        shards.setdefault(str(p["year"]), []).append(row)
+    return shards
+
+
+def main():
+    argparse.ArgumentParser(description="Export a static paper snapshot into public/paper-data").parse_args()
+
+    with open(PAPERS_JSON) as f:
+        papers = json.load(f)
+    page_images = {}
+    if os.path.exists(MAPPING_FILE):
+        with open(MAPPING_FILE) as f:
+            page_images = {pid: e["urls"] for pid, e in group_urls(json.load(f)).items()}
+    else:
+        print(f"WARNING: {MAPPING_FILE} not found, page_images will be empty")
+
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    old_index = {}
+    if os.path.exists(INDEX_FILE):
+        with open(INDEX_FILE) as f:
+            old_index = json.load(f)
+    old_files = {y: s["file"] for y, s in old_index.get("years", {}).items()}
+    codecs = compressors()
+    suffixes = [s for s, _ in codecs]
+
+    shards = build_shards(papers, page_images)
+    jobs, years = [], {}
+    for year, rows in shards.items():
+        data = compact(rows)
+        name = f"papers-{year}.{hashlib.sha256(data).hexdigest()[:12]}.json"
+        path = os.path.join(OUTPUT_DIR, name)
+        years[year] = {"file": name, "url": f"{URL_PREFIX}/{name}", "papers": len(rows)}
+        old = old_index.get("years", {}).get(year, {})
+        if old.get("file") == name and all(os.path.exists(path + s) for s in [""] + suffixes):
+            years[year]["bytes"] = old["bytes"]
+            continue
+        jobs.append((year, path, data))
+
+    # zlib and brotli release the GIL, so threads compress shards in parallel
+    with ThreadPoolExecutor(max_workers=min(8, len(jobs) or 1)) as pool:
+        results = pool.map(lambda job: (job[0], write_variants(job[1], job[2], codecs)), jobs)
+        for year, sizes in results:
+            years[year]["bytes"] = sizes
+            print(f"  wrote {years[year]['file']}  " +
+                  "  ".join(f"{s} {n / 1024:.0f} KB" for s, n in sizes.items()))
+
+    for year, name in old_files.items():
+        if years.get(year, {}).get("file") != name:
+            remove_variants(os.path.join(OUTPUT_DIR, name))
+
+    index = {
+        "version": SNAPSHOT_VERSION,
+        "years": dict(sorted(years.items())),
+        "fields": INDEX_FIELDS,
+        "papers": [[row[f] for f in INDEX_FIELDS] for rows in shards.values() for row in rows],
+    }
+    data = compact(index)
+    current = b""
+    if all(os.path.exists(INDEX_FILE + s) for s in [""] + suffixes):
+        with open(INDEX_FILE, "rb") as f:
+            current = f.read()
+    if current != data:
+        write_variants(INDEX_FILE, data, codecs)
+
+    print(f"\nSnapshot: {len(papers)} papers in {len(years)} year shards "
+          f"({len(jobs)} rewritten, {len(years) - len(jobs)} unchanged)")
+    print(f"Index: {INDEX_FILE}")
+
+
+if __name__ == "__main__":
+    main()
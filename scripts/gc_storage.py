@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Garbage-collect orphaned objects in the paper-images bucket.
+upload_images.py only ever upserts, so pages that were remapped or
+re-rendered under another name stay in storage. This:
+- lists the bucket concurrently (one task per folder, paged), limited to
+  the prefixes the upload pipeline owns (page folders, thumbs/, manifests/)
+- builds the referenced set from the current page coverage (the same
+  engine generate_mapping.py uses, so a stale paper_page_mapping.json
+  can't drop live pages) plus every URL in page_images, and diffs the
+  two as sets; tiles, tile/text manifests and SVG/PDF exports of a kept
+  page are kept with it
+- deletes the difference in bulk batches, concurrently; dry run unless
+  --apply, and deleted pages are dropped from the upload checkpoint
+
+  python3 scripts/gc_storage.py                 # dry run: what would be deleted
+  python3 scripts/gc_storage.py --apply
+  NEXT_PUBLIC_SUPABASE_URL=http://127.0.0.1:54321 python3 scripts/gc_storage.py --rows data/rows.json
+"""
+
+import argparse
+import json
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+from page_coverage import load_coverage
+from sources import FOLDERS
+from upload_images import BUCKET, DONE_FILE, MANIFEST_PREFIX, SUPABASE_URL, THUMB_PREFIX, WORKERS, make_session
+from verify_images import image_rel, load_rows
+
+LIST_PAGE = 1000  # objects per list request (Supabase maximum)
+DELETE_BATCH = 1000  # names per bulk delete request
+OWNED_PREFIXES = sorted(FOLDERS) + [THUMB_PREFIX, MANIFEST_PREFIX]
+# {folder}/page-NN.<ext> and {folder}/page-NN_files/... belong to page {folder}/page-NN
+PAGE_RE = re.compile(r"^(.+/page-\d+)(?:\.|_files/)")
+
+
+def list_prefix(session, prefix):
+    """All entries directly under prefix. Returns (object keys, sub-folder prefixes)."""
+    files, folders, offset = [], [], 0
+    while True:
+        r = session.post(
+            f"{SUPABASE_URL}/storage/v1/object/list/{BUCKET}",
+            json={"prefix": prefix, "limit": LIST_PAGE, "offset": offset,
+                  "sortBy": {"column": "name", "order": "asc"}},
+            timeout=30,
+        )
+        r.raise_for_status()
+        page = r.json()
+        for entry in page:
+            path = f"{prefix}/{entry['name']}" if prefix else entry["name"]
+            # Folders are returned as placeholders without an id
+            (folders if entry.get("id") is None else files).append(path)
+        if len(page) < LIST_PAGE:
+            return files, folders
+        offset += LIST_PAGE
+
+
+def list_bucket(session, prefixes, workers):
+    """Walk the given prefixes breadth-first, listing each level's folders in parallel."""
+    objects = []
+    level = list(prefixes)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        while level:
+            results = list(pool.map(lambda p: list_prefix(session, p), level))
+            level = []
+            for files, folders in results:
+                objects += files
+                level += folders
+    return set(objects)
+
+
+def referenced(coverage, rows):
+    """Object keys that must stay: mapped pages, their thumbnails, manifests, page_images."""
+    keep = set()
+    for rec in coverage["index"]:
+        if rec["status"] != "mapped":
+            continue
+        img = rec["image"]
+        keep.add(img)
+        keep.add(f"{THUMB_PREFIX}/{img}")
+        keep.add(f"{MANIFEST_PREFIX}/{img.split('/', 1)[0]}.json")
+    for row in rows:
+        for url in row.get("page_images") or []:
+            rel = image_rel(url)
+            if rel:
+                keep.add(rel)
+                keep.add(f"{THUMB_PREFIX}/{rel}")
+    return keep
+
+
+def is_referenced(name, keep, pages):
+    if name in keep:
+        return True
+    m = PAGE_RE.match(name)  # sidecar of a kept page (tiles, .tiles.json, .text.json, .svg, .pdf)
+    return bool(m) and m.group(1) in pages
+
+
+def delete_batch(session, names):
+    r = session.delete(
+        f"{SUPABASE_URL}/storage/v1/object/{BUCKET}",
+        json={"prefixes": names}, timeout=60,
+    )
+    if r.status_code != 200:
+        return [], f"HTTP {r.status_code}: {r.text[:200]}"
+    return [o["name"] for o in r.json()], None
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Delete unreferenced objects from the paper-images bucket")
+    ap.add_argument("--apply", action="store_true", help="actually delete (default: dry run)")
+    ap.add_argument("--rows", help="JSON list of rows with page_images (default: fetch from DB)")
+    ap.add_argument("--workers", type=int, default=WORKERS * 2)
+    args = ap.parse_args()
+
+    coverage = load_coverage()
+    session = make_session(pool_size=args.workers)
+    rows = load_rows(args.rows, session)
+    keep = referenced(coverage, rows)
+    if not keep:
+        print("ERROR: nothing is referenced (no mapped pages and no page_images?), refusing to GC")
+        return
+
+    objects = list_bucket(session, OWNED_PREFIXES, args.workers)
+    pages = {k[:-len(".webp")] for k in keep if k.endswith(".webp")}
+    orphans = sorted(o for o in objects if not is_referenced(o, keep, pages))
+    missing = sorted(k for k in keep - objects if not k.startswith(THUMB_PREFIX + "/"))
+    print(f"{len(objects)} objects under {len(OWNED_PREFIXES)} prefixes, "
+          f"{len(keep)} referenced, {len(orphans)} orphaned")
+    if missing:
+        print(f"  NOTE: {len(missing)} referenced objects are not in the bucket "
+              f"(run verify_images.py): {missing[:5]}")
+
+    by_top = {}
+    for name in orphans:
+        by_top.setdefault(name.split("/", 1)[0], []).append(name)
+    for top, names in sorted(by_top.items()):
+        print(f"  {top:<16} {len(names):>5}  e.g. {names[0]}")
+
+    if not args.apply:
+        print("\nDry run. Re-run with --apply to delete.")
+        return
+
+    batches = [orphans[i:i + DELETE_BATCH] for i in range(0, len(orphans), DELETE_BATCH)]
+    deleted = []
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        for names, err in pool.map(lambda b: delete_batch(session, b), batches):
+            deleted += names
+            if err:
+                print(f"  ERR batch: {err}")
+    print(f"\nDeleted {len(deleted)}/{len(orphans)} objects in {len(batches)} batches")
+
+    if deleted and os.path.exists(DONE_FILE):
+        with open(DONE_FILE) as f:
+            done = json.load(f)
+        dropped = [n for n in deleted if done.pop(n, None) is not None]
+        if dropped:
+            with open(DONE_FILE, "w") as f:
+                json.dump(done, f)
+            print(f"Removed {len(dropped)} entries from {DONE_FILE}")
+
+
+if __name__ == "__main__":
+    main()
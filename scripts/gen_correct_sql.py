@@ -8,9 +8,9 @@ Generate correct SQL INSERT statements with proper types:
 
 import json
 
-PAPERS_JSON = "/Users/randy/dsespeakingweb/data/pastpaper_papers.json"
-ADDPP_FILE = "/Users/randy/dsespeakingweb/addpp.md"
-OUTPUT = "/Users/randy/dsespeakingweb/data/insert_correct.sql"
+PAPERS_JSON = "data/pastpaper_papers.json"
+ADDPP_FILE = "addpp.md"
+OUTPUT = "data/insert_correct.sql"
 
 with open(ADDPP_FILE) as f:
     new_papers = json.load(f)
@@ -71,7 +71,7 @@ print(f"Generated {len(statements)} statements -> {OUTPUT}")
 
 # Also write individual files for MCP execution
 for i, s in enumerate(statements):
-    fname = f"/Users/randy/dsespeakingweb/data/stmt_{i}.sql"
+    fname = f"data/stmt_{i}.sql"
     with open(fname, "w", encoding="utf-8") as f:
         f.write(s + ";")
 
@@ -7,9 +7,9 @@ Output one file per statement.
 import json
 import os
 
-PAPERS_JSON = "/Users/randy/dsespeakingweb/data/pastpaper_papers.json"
-ADDPP_FILE = "/Users/randy/dsespeakingweb/addpp.md"
-OUTPUT_DIR = "/Users/randy/dsespeakingweb/data/mcp_stmts"
+PAPERS_JSON = "data/pastpaper_papers.json"
+ADDPP_FILE = "addpp.md"
+OUTPUT_DIR = "data/mcp_stmts"
 
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Quality/size report for the images produced by pdf_to_images.py.
+- per page: encoded bytes, dimensions, PSNR and SSIM against the
+  lossless render (served from the raster cache when warm), cropped to
+  the page's box in crop_boxes.json when it was rendered with --crop
+- per folder and overall totals
+- compares with a stored baseline over the pages present in both (new
+  years or PDFs are not growth) and exits non-zero when bytes grow or
+  quality drops past the thresholds below, or when a page's dimensions
+  differ from its reference render
+
+  python3 scripts/image_report.py                    # report + gate
+  python3 scripts/image_report.py --update-baseline  # accept current numbers
+"""
+
+import argparse
+import json
+import os
+import sys
+
+import pdf_to_images
+from pdf_to_images import (CROP_FILE, PDF_DIR, PDF_RULES, OUTPUT_DIR, DPI, QUALITY, kept_pages,
+                           render_clip, render_page)
+from raster_cache import RasterCache
+
+REPORT_JSON = "data/image_report.json"
+BASELINE_JSON = "data/image_report_baseline.json"
+
+# Regression thresholds (current vs baseline)
+MAX_BYTES_GROWTH = 0.05  # bytes of the pages in both reports may grow at most 5%
+MAX_MEAN_SSIM_DROP = 0.005
+MAX_MIN_SSIM_DROP = 0.02
+MAX_MEAN_PSNR_DROP = 0.5  # dB
+
+SSIM_WINDOW = 8
+
+
+def psnr(ref, img):
+    import numpy as np
+    mse = np.mean((ref.astype(np.float64) - img.astype(np.float64)) ** 2)
+    return 100.0 if mse == 0 else float(10 * np.log10(255.0 ** 2 / mse))
+
+
+def ssim(ref, img):
+    """Mean SSIM over non-overlapping SSIM_WINDOW blocks of the luma channel."""
+    import numpy as np
+    c1, c2 = (0.01 * 255) ** 2, (0.03 * 255) ** 2
+    w = SSIM_WINDOW
+    h, wd = (ref.shape[0] // w) * w, (ref.shape[1] // w) * w
+
+    def blocks(a):
+        a = a[:h, :wd].astype(np.float64)
+        return a.reshape(h // w, w, wd // w, w).transpose(0, 2, 1, 3).reshape(h // w, wd // w, -1)
+
+    x, y = blocks(ref), blocks(img)
+    mx, my = x.mean(axis=2), y.mean(axis=2)
+    vx, vy = x.var(axis=2), y.var(axis=2)
+    cov = ((x - mx[..., None]) * (y - my[..., None])).mean(axis=2)
+    s = ((2 * mx * my + c1) * (2 * cov + c2)) / ((mx ** 2 + my ** 2 + c1) * (vx + vy + c2))
+    return float(s.mean())
+
+
+def measure_page(page, out_file, box=None):
+    import fitz  # pymupdf
+    import numpy as np
+    from PIL import Image
+
+    zoom = DPI / 72.0
+    ref = render_clip(page, fitz.Rect(box), zoom) if box else render_page(page, zoom)
+    ref = ref.convert("RGB")
+    enc = Image.open(out_file).convert("RGB")
+    result = {"bytes": os.path.getsize(out_file), "width": enc.width, "height": enc.height}
+    if enc.size != ref.size:
+        # Not scored: resampling would hide the very change the gate should catch
+        result["expected"] = list(ref.size)
+        return result
+    a, b = np.asarray(ref), np.asarray(enc)
+    return {
+        **result,
+        "psnr": round(psnr(a, b), 3),
+        "ssim": round(ssim(np.asarray(ref.convert("L")), np.asarray(enc.convert("L"))), 5),
+    }
+
+
+def summarize(pages):
+    """Totals; quality is averaged over the pages that could be scored."""
+    scored = [p for p in pages if "ssim" in p]
+    if not scored:
+        return {"pages": len(pages), "bytes": sum(p["bytes"] for p in pages),
+                "mean_ssim": 0, "min_ssim": 0, "mean_psnr": 0}
+    return {
+        "pages": len(pages),
+        "bytes": sum(p["bytes"] for p in pages),
+        "mean_ssim": round(sum(p["ssim"] for p in scored) / len(scored), 5),
+        "min_ssim": min(p["ssim"] for p in scored),
+        "mean_psnr": round(sum(p["psnr"] for p in scored) / len(scored), 3),
+    }
+
+
+def build_report():
+    import fitz  # pymupdf
+
+    crops = {}
+    if os.path.exists(CROP_FILE):
+        with open(CROP_FILE) as f:
+            crops = json.load(f)
+    pages, folders = {}, {}
+    for pdf_name, rule in PDF_RULES.items():
+        pdf_path = os.path.join(PDF_DIR, pdf_name)
+        if not os.path.exists(pdf_path):
+            print(f"  SKIP (not found): {pdf_name}")
+            continue
+        key = rule["key"]
+        doc = fitz.open(pdf_path)
+        folder_pages = []
+        for page_num, img_index in kept_pages(len(doc), rule["pages"]):
+            rel = f"{key}/page-{img_index:02d}.webp"
+            out_file = os.path.join(OUTPUT_DIR, rel)
+            if not os.path.exists(out_file):
+                print(f"  MISSING output: {rel}")
+                continue
+            pages[rel] = measure_page(doc[page_num], out_file, crops.get(rel, {}).get("box"))
+            folder_pages.append(pages[rel])
+            if "expected" in pages[rel]:
+                print(f"  SIZE MISMATCH: {rel}")
+        doc.close()
+        folders[key] = summarize(folder_pages)
+        f = folders[key]
+        print(f"  {key:<14} {f['pages']:>3} pages  {f['bytes'] / 1024:>8.0f} KB  "
+              f"SSIM {f['mean_ssim']:.4f} (min {f['min_ssim']:.4f})  PSNR {f['mean_psnr']:.2f} dB")
+    return {
+        "settings": {"dpi": DPI, "quality": QUALITY},
+        "totals": summarize(list(pages.values())),
+        "folders": folders,
+        "pages": pages,
+    }
+
+
+def compare(report, baseline):
+    """
+    Return a list of regression messages (empty = pass). Bytes and quality
+    are compared over the pages present in both reports.
+    """
+    failures = [f"{rel}: encoded {p['width']}x{p['height']}, reference {p['expected'][0]}x{p['expected'][1]}"
+                for rel, p in sorted(report["pages"].items()) if "expected" in p]
+    common = sorted(set(report["pages"]) & set(baseline["pages"]))
+    cur = summarize([report["pages"][rel] for rel in common])
+    base = summarize([baseline["pages"][rel] for rel in common])
+    if base["bytes"] and cur["bytes"] > base["bytes"] * (1 + MAX_BYTES_GROWTH):
+        failures.append(f"bytes of {len(common)} common pages {base['bytes']} -> {cur['bytes']} "
+                        f"(+{(cur['bytes'] / base['bytes'] - 1) * 100:.1f}%, limit {MAX_BYTES_GROWTH * 100:.0f}%)")
+    if base["mean_ssim"] - cur["mean_ssim"] > MAX_MEAN_SSIM_DROP:
+        failures.append(f"mean SSIM {base['mean_ssim']} -> {cur['mean_ssim']}")
+    if base["min_ssim"] - cur["min_ssim"] > MAX_MIN_SSIM_DROP:
+        failures.append(f"min SSIM {base['min_ssim']} -> {cur['min_ssim']}")
+    if base["mean_psnr"] - cur["mean_psnr"] > MAX_MEAN_PSNR_DROP:
+        failures.append(f"mean PSNR {base['mean_psnr']} -> {cur['mean_psnr']} dB")
+    return failures
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Image size/quality report with baseline gating")
+    ap.add_argument("--update-baseline", action="store_true", help="store this report as the baseline")
+    ap.add_argument("--no-cache", action="store_true", help="re-render references without the raster cache")
+    args = ap.parse_args()
+
+    if not args.no_cache:
+        pdf_to_images.raster_cache = RasterCache()
+
+    report = build_report()
+    t = report["totals"]
+    print(f"\nTotal: {t['pages']} pages, {t['bytes'] / 1024 / 1024:.2f} MB, "
+          f"SSIM {t['mean_ssim']:.4f} (min {t['min_ssim']:.4f}), PSNR {t['mean_psnr']:.2f} dB")
+
+    with open(REPORT_JSON, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Report: {REPORT_JSON}")
+
+    if args.update_baseline:
+        with open(BASELINE_JSON, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline updated: {BASELINE_JSON}")
+        return
+    if not os.path.exists(BASELINE_JSON):
+        print("No baseline yet. Run with --update-baseline to create one.")
+        return
+
+    with open(BASELINE_JSON) as f:
+        baseline = json.load(f)
+    for key, cur in report["folders"].items():
+        old = baseline["folders"].get(key)
+        if old and old["bytes"]:
+            delta = (cur["bytes"] / old["bytes"] - 1) * 100
+            if abs(delta) >= 1:
+                print(f"  {key}: bytes {delta:+.1f}%, SSIM {cur['mean_ssim'] - old['mean_ssim']:+.4f}")
+    failures = compare(report, baseline)
+    if failures:
+        print("\nREGRESSION:")
+        for msg in failures:
+            print(f"  {msg}")
+        sys.exit(1)
+    print("\nNo regression against baseline.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,90 +1,230 @@
 #!/usr/bin/env python3
 """
 Import new papers from addpp.md into pastpaper_papers.json.
-Adds UUID, timestamps, and merges with existing data.
-Also generates SQL INSERT statements for Supabase.
+Adds deterministic ids, timestamps, and merges with existing data.
+Also generates idempotent SQL (chunked upserts) for Supabase.
+- ids are UUIDv5 of paper_id, so every environment derives the same id
+- records are validated/normalized in parallel before anything is written
+- re-running after a partial failure is safe: chunks are upserts and
+  --push skips chunks already recorded in the checkpoint file
 """
 
+import argparse
+import hashlib
 import json
+import os
+import re
 import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timezone
 
-ADDPP_FILE = "/Users/randy/dsespeakingweb/addpp.md"
-PAPERS_JSON = "/Users/randy/dsespeakingweb/data/pastpaper_papers.json"
-SQL_OUTPUT = "/Users/randy/dsespeakingweb/data/insert_new_papers.sql"
+import config
+from paper_sql import upsert_sql
+
+ADDPP_FILE = "addpp.md"
+PAPERS_JSON = "data/pastpaper_papers.json"
+SQL_OUTPUT = "data/insert_new_papers.sql"
+DONE_FILE = "data/.import_done.json"  # pushed chunk checkpoint
+
+SUPABASE_URL = config.get("NEXT_PUBLIC_SUPABASE_URL", "https://wkhqphemaatzdnscnnyd.supabase.co")
+
+# Fixed namespace: never change it, or ids stop matching across environments
+PAPER_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_URL, "dsespeaking/pastpaper_papers")
+
+CHUNK_SIZE = 10  # papers per transaction / request
+PAPER_ID_RE = re.compile(r"^[0-9a-z]+-\d+\.\d+$")
+# The bank's own spellings (low/medium/high) plus the easy/hard UI aliases
+DIFFICULTIES = {"low", "medium", "high", "easy", "hard"}
+
+
+def paper_uuid(paper_id):
+    return str(uuid.uuid5(PAPER_NAMESPACE, paper_id))
+
+
+def as_list(v):
+    if v is None:
+        return []
+    return [v] if isinstance(v, str) else list(v)
+
+
+def normalize(p):
+    """Validate and normalize one addpp.md record. Returns (record, errors)."""
+    errors = []
+    pid = str(p.get("paper_id", "")).strip()
+    out = dict(p)
+    out["paper_id"] = pid
+    out["paper_number"] = str(p.get("paper_number", "")).strip()
+    if not PAPER_ID_RE.match(pid):
+        errors.append(f"bad paper_id {pid!r}")
+    elif not pid.endswith("-" + out["paper_number"]):
+        errors.append(f"paper_id {pid!r} does not end with paper_number {out['paper_number']!r}")
+    try:
+        out["year"] = int(p.get("year"))
+    except (TypeError, ValueError):
+        errors.append(f"bad year {p.get('year')!r}")
+
+    for field in ("topic", "part_a_title", "part_a_source"):
+        out[field] = str(p.get(field) or "").strip()
+    if not out["topic"]:
+        errors.append("empty topic")
+    out["part_a_article"] = [str(s) for s in as_list(p.get("part_a_article"))]
+    out["part_a_discussion_points"] = [str(s).strip() for s in as_list(p.get("part_a_discussion_points"))]
+
+    questions = []
+    for i, q in enumerate(as_list(p.get("part_b_questions")), start=1):
+        if isinstance(q, str):
+            q = {"text": q}
+        q = dict(q)
+        q["text"] = str(q.get("text", "")).strip()
+        try:
+            q["number"] = int(q.get("number") or i)
+        except (TypeError, ValueError):
+            errors.append(f"question {i}: bad number {q.get('number')!r}")
+            q["number"] = i
+        q["difficulty"] = str(q.get("difficulty") or "medium").lower()
+        if q["difficulty"] not in DIFFICULTIES:
+            errors.append(f"question {i}: unknown difficulty {q['difficulty']!r}")
+        if "difficulty_level" in q:
+            q["difficulty_level"] = str(q["difficulty_level"])
+        if not q["text"]:
+            errors.append(f"question {i}: empty text")
+        questions.append(q)
+    out["part_b_questions"] = questions
+
+    return out, [f"{pid or '?'}: {e}" for e in errors]
+
+
+def chunk_key(chunk):
+    raw = json.dumps(chunk, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def push_chunks(chunks, workers):
+    """Upsert chunks via PostgREST, skipping ones already checkpointed."""
+    import requests
+
+    service_key = config.get("SUPABASE_SERVICE_ROLE_KEY")
+    if not service_key:
+        print("ERROR: Set SUPABASE_SERVICE_ROLE_KEY in .env.local or env")
+        return
+    headers = {
+        "apikey": service_key,
+        "Authorization": f"Bearer {service_key}",
+        "Content-Type": "application/json",
+        "Prefer": "return=minimal,resolution=merge-duplicates",
+    }
+
+    done = {}
+    if os.path.exists(DONE_FILE):
+        with open(DONE_FILE) as f:
+            done = json.load(f)
+    todo = [(chunk_key(c), c) for c in chunks]
+    todo = [(k, c) for k, c in todo if k not in done]
+    print(f"\nPush: {len(chunks)} chunks, {len(chunks) - len(todo)} already done")
+
+    session = requests.Session()
+
+    def send(item):
+        key, chunk = item
+        try:
+            r = session.post(
+                f"{SUPABASE_URL}/rest/v1/pastpaper_papers?on_conflict=id",
+                headers=headers, json=chunk, timeout=30,
+            )
+            return key, chunk, r.status_code in (200, 201), r.text[:200]
+        except Exception as e:
+            return key, chunk, False, str(e)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for key, chunk, ok, detail in pool.map(send, todo):
+            pids = [p["paper_id"] for p in chunk]
+            if ok:
+                done[key] = pids
+                print(f"  OK  {pids[0]} .. {pids[-1]}")
+            else:
+                print(f"  ERR {pids[0]} .. {pids[-1]}: {detail}")
+
+    with open(DONE_FILE, "w") as f:
+        json.dump(done, f, indent=2)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Import addpp.md into the paper bank")
+    ap.add_argument("--push", action="store_true", help="upsert chunks to Supabase via REST")
+    ap.add_argument("--workers", type=int, default=4, help="parallel validation / push workers")
+    args = ap.parse_args(argv)
 
-
-def main():
     with open(ADDPP_FILE) as f:
-        new_papers = json.load(f)
+        raw_papers = json.load(f)
 
     with open(PAPERS_JSON) as f:
         existing = json.load(f)
 
-    # Build set of existing paper_ids
-    existing_ids = {p["paper_id"] for p in existing}
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        results = list(pool.map(normalize, raw_papers, chunksize=16))
+    errors = [e for _, errs in results for e in errs]
+    if errors:
+        print(f"ERROR: {len(errors)} validation problems, nothing written:")
+        for e in errors:
+            print(f"  {e}")
+        return
+    new_papers = [p for p, _ in results]
+
+    seen = set()
+    dupes = [p["paper_id"] for p in new_papers if p["paper_id"] in seen or seen.add(p["paper_id"])]
+    if dupes:
+        print(f"ERROR: duplicate paper_ids in {ADDPP_FILE}: {dupes}")
+        return
+
+    by_pid = {p["paper_id"]: p for p in existing}
     print(f"Existing papers: {len(existing)}")
-    print(f"New papers to add: {len(new_papers)}")
+    print(f"Papers in batch: {len(new_papers)}")
 
     now = datetime.now(timezone.utc).isoformat()
     added = []
-    skipped = []
+    batch = []
 
     for p in new_papers:
-        if p["paper_id"] in existing_ids:
-            skipped.append(p["paper_id"])
+        current = by_pid.get(p["paper_id"])
+        if current is not None:
+            # Already imported (maybe by an earlier partial run): keep its id
+            # and timestamps so the emitted upsert is byte-identical.
+            batch.append(current)
             continue
 
-        # Add required fields
-        p["id"] = str(uuid.uuid4())
+        p["id"] = paper_uuid(p["paper_id"])
         p["created_at"] = now
         p["updated_at"] = now
 
         existing.append(p)
+        by_pid[p["paper_id"]] = p
+        batch.append(p)
         added.append(p["paper_id"])
 
-    if skipped:
-        print(f"\nSkipped (already exist): {skipped}")
-
     print(f"\nAdded {len(added)} new papers:")
     for pid in added:
         print(f"  + {pid}")
+    if len(batch) > len(added):
+        print(f"Re-emitting {len(batch) - len(added)} already imported papers (idempotent)")
 
     # Save merged JSON
     with open(PAPERS_JSON, "w", encoding="utf-8") as f:
         json.dump(existing, f, indent=2, ensure_ascii=False)
     print(f"\nSaved to {PAPERS_JSON} ({len(existing)} total)")
 
-    # Generate SQL for Supabase
-    sql_lines = []
-    for p in existing:
-        if p["paper_id"] not in added:
-            continue
-
-        # Escape single quotes in strings
-        def esc(s):
-            if s is None:
-                return "NULL"
-            return "'" + str(s).replace("'", "''") + "'"
-
-        sql = f"""INSERT INTO pastpaper_papers (
-  id, year, paper_number, paper_id, topic,
-  part_a_title, part_a_source, part_a_article,
-  part_a_discussion_points, part_b_questions,
-  created_at, updated_at
-) VALUES (
-  {esc(p['id'])}, {p['year']}, {esc(p['paper_number'])}, {esc(p['paper_id'])}, {esc(p['topic'])},
-  {esc(p.get('part_a_title',''))}, {esc(p.get('part_a_source',''))},
-  {esc(json.dumps(p.get('part_a_article',[]), ensure_ascii=False))}::jsonb,
-  {esc(json.dumps(p.get('part_a_discussion_points',[]), ensure_ascii=False))}::jsonb,
-  {esc(json.dumps(p.get('part_b_questions',[]), ensure_ascii=False))}::jsonb,
-  {esc(p['created_at'])}, {esc(p['updated_at'])}
-);"""
-        sql_lines.append(sql)
-
+    # Generate chunked, re-runnable SQL for Supabase
+    chunks = [batch[i:i + CHUNK_SIZE] for i in range(0, len(batch), CHUNK_SIZE)]
     with open(SQL_OUTPUT, "w", encoding="utf-8") as f:
-        f.write("\n\n".join(sql_lines))
-    print(f"SQL file saved: {SQL_OUTPUT} ({len(sql_lines)} statements)")
+        for chunk in chunks:
+            f.write("BEGIN;\n")
+            for p in chunk:
+                f.write(upsert_sql(p) + ";\n")
+            f.write("COMMIT;\n\n")
+    print(f"SQL file saved: {SQL_OUTPUT} ({len(batch)} upserts in {len(chunks)} chunks)")
+
+    if args.push:
+        push_chunks(chunks, args.workers)
+    return added
 
 
 if __name__ == "__main__":
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Offline load test for the upload / insert paths against local_supabase.py.
+- storage: uploads page images through upload_images.upload_one at
+  several worker counts; one "req" there is a full upload_one call
+  (thumbnail encode + page upload + thumbnail upload)
+- rows: POSTs pastpaper_papers rows to PostgREST at several batch sizes
+- reports wall time, req/s, p50/p95 latency and injected failures
+
+Usage:
+  python3 scripts/load_test.py --workers 1,4,8 --batch 1,10,50 --latency 0.03 --error-rate 0.02
+"""
+
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from local_supabase import start_server
+
+PAPERS_JSON = "data/pastpaper_papers.json"
+IMAGES_DIR = "data/images"
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def report(label, wall, latencies, failed):
+    n = len(latencies)
+    print(
+        f"  {label:<14} {n:>5} req  {wall:6.2f}s  {n / wall if wall else 0:7.1f} req/s  "
+        f"p50 {percentile(latencies, 50) * 1000:6.1f}ms  p95 {percentile(latencies, 95) * 1000:6.1f}ms  "
+        f"failed {failed}"
+    )
+
+
+def list_images(limit):
+    imgs = []
+    for folder in sorted(os.listdir(IMAGES_DIR)):
+        folder_path = os.path.join(IMAGES_DIR, folder)
+        if not os.path.isdir(folder_path):
+            continue
+        imgs += [f"{folder}/{f}" for f in sorted(os.listdir(folder_path)) if f.endswith(".webp")]
+    return imgs[:limit] if limit else imgs
+
+
+def bench_storage(upload_images, images, workers):
+    session = upload_images.make_session(pool_size=workers)
+    latencies = []
+
+    def timed(img):
+        t0 = time.perf_counter()
+        _, url = upload_images.upload_one(session, img)
+        latencies.append(time.perf_counter() - t0)
+        return url
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(timed, images))
+    wall = time.perf_counter() - t0
+    report(f"workers={workers}", wall, latencies, sum(1 for r in results if not r))
+
+
+def bench_rows(upload_images, base_url, papers, batch, workers):
+    session = upload_images.make_session(pool_size=workers)
+    headers = {
+        "Content-Type": "application/json",
+        "Prefer": "return=minimal,resolution=merge-duplicates",
+    }
+    chunks = [papers[i:i + batch] for i in range(0, len(papers), batch)]
+    latencies = []
+
+    def timed(chunk):
+        t0 = time.perf_counter()
+        try:
+            r = session.post(f"{base_url}/rest/v1/pastpaper_papers", headers=headers,
+                             json=chunk, timeout=30)
+            ok = r.status_code in (200, 201)
+        except Exception:
+            ok = False
+        latencies.append(time.perf_counter() - t0)
+        return ok
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(timed, chunks))
+    wall = time.perf_counter() - t0
+    report(f"batch={batch}", wall, latencies, sum(1 for r in results if not r))
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Load test against the local Supabase stand-in")
+    ap.add_argument("--workers", default="1,4,8", help="comma-separated upload worker counts")
+    ap.add_argument("--batch", default="1,10,50", help="comma-separated row batch sizes")
+    ap.add_argument("--row-workers", type=int, default=4, help="concurrent row POSTs")
+    ap.add_argument("--images", type=int, default=100, help="max images to upload (0 = all)")
+    ap.add_argument("--latency", type=float, default=0.02)
+    ap.add_argument("--jitter", type=float, default=0.01)
+    ap.add_argument("--error-rate", type=float, default=0.0)
+    ap.add_argument("--rate-limit", type=int, default=0)
+    args = ap.parse_args()
+
+    fake, server, base_url = start_server(
+        latency=args.latency, jitter=args.jitter,
+        error_rate=args.error_rate, rate_limit=args.rate_limit, seed=0,
+    )
+    # upload_images reads its endpoint at import time
+    os.environ["NEXT_PUBLIC_SUPABASE_URL"] = base_url
+    os.environ["SUPABASE_SERVICE_ROLE_KEY"] = "local"
+    import upload_images
+
+    print(f"Stand-in at {base_url}: latency={args.latency}s jitter={args.jitter}s "
+          f"error_rate={args.error_rate} rate_limit={args.rate_limit or 'off'}")
+
+    images = list_images(args.images)
+    print(f"\nStorage uploads ({len(images)} images; req = thumbnail + 2 uploads):")
+    for w in (int(x) for x in args.workers.split(",")):
+        bench_storage(upload_images, images, w)
+
+    with open(PAPERS_JSON) as f:
+        papers = json.load(f)
+    print(f"\nRow inserts ({len(papers)} papers, {args.row_workers} workers):")
+    for b in (int(x) for x in args.batch.split(",")):
+        fake.tables["pastpaper_papers"].clear()
+        bench_rows(upload_images, base_url, papers, b, args.row_workers)
+
+    print(f"\nServer stats: {fake.stats}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,388 @@
+#!/usr/bin/env python3
+"""
+In-process stand-in for the Supabase endpoints the import scripts use.
+- PostgREST: GET/POST/PATCH/DELETE /rest/v1/pastpaper_papers
+  (eq./in. filters, select=, Prefer: return=minimal|representation,
+   resolution=merge-duplicates, 409/23505 on duplicate id)
+- Storage: POST/PUT/GET/HEAD/DELETE /storage/v1/object/{bucket}/{path},
+  GET /storage/v1/object/public/{bucket}/{path} (with Range support),
+  POST /storage/v1/object/list/{bucket}, DELETE /storage/v1/object/{bucket}
+- TUS resumable uploads at /storage/v1/upload/resumable (creation,
+  termination, checksum (sha1) and concatenation extensions)
+- configurable latency, error injection and rate limit (429)
+
+Standalone:
+  python3 scripts/local_supabase.py --port 54321 --latency 0.05 --error-rate 0.02
+  NEXT_PUBLIC_SUPABASE_URL=http://127.0.0.1:54321 python3 scripts/upload_images.py
+"""
+
+import argparse
+import base64
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs, unquote
+
+REST_PREFIX = "/rest/v1/"
+STORAGE_PREFIX = "/storage/v1/object/"
+TUS_PREFIX = "/storage/v1/upload/resumable"
+TUS_EXTENSIONS = "creation,termination,checksum,concatenation"
+
+
+class FakeSupabase:
+    """Shared state + fault injection for the handler."""
+
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, rate_limit=0, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit  # requests per second, 0 = unlimited
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.tables = {"pastpaper_papers": {}}  # table -> id -> row
+        self.objects = {}  # (bucket, path) -> {"data", "content_type", "etag", "cache_control"}
+        self.uploads = {}  # TUS id -> {"length", "data", "meta", "partial"}
+        self.stats = {"requests": 0, "errors": 0, "throttled": 0, "bytes_in": 0}
+        self._tokens = float(rate_limit)
+        self._last = time.monotonic()
+
+    def admit(self):
+        """Apply latency/limits. Returns an HTTP status to fail with, or None."""
+        delay = self.latency + (self.rng.uniform(0, self.jitter) if self.jitter else 0)
+        if delay:
+            time.sleep(delay)
+        with self.lock:
+            self.stats["requests"] += 1
+            if self.rate_limit:
+                now = time.monotonic()
+                self._tokens = min(self.rate_limit, self._tokens + (now - self._last) * self.rate_limit)
+                self._last = now
+                if self._tokens < 1:
+                    self.stats["throttled"] += 1
+                    return 429
+                self._tokens -= 1
+            if self.error_rate and self.rng.random() < self.error_rate:
+                self.stats["errors"] += 1
+                return 503
+        return None
+
+
+    def store(self, bucket, key, data, content_type, cache_control=""):
+        """Save an object (caller holds the lock)."""
+        self.objects[(bucket, key)] = {
+            "data": bytes(data),
+            "content_type": content_type,
+            "etag": '"' + hashlib.md5(data).hexdigest() + '"',
+            "cache_control": cache_control,
+        }
+
+
+def tus_metadata(header):
+    """Parse a TUS Upload-Metadata header ("key b64,key b64")."""
+    meta = {}
+    for item in filter(None, (p.strip() for p in (header or "").split(","))):
+        k, _, v = item.partition(" ")
+        meta[k] = base64.b64decode(v).decode("utf-8") if v else ""
+    return meta
+
+
+def match_filters(row, filters):
+    for col, expr in filters.items():
+        op, _, val = expr.partition(".")
+        cell = "" if row.get(col) is None else str(row.get(col))
+        if op == "eq" and cell != val:
+            return False
+        if op == "in" and cell not in val.strip("()").split(","):
+            return False
+    return True
+
+
+def make_handler(fake):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, fmt, *args):
+            pass
+
+        # --- plumbing ---
+        def _body(self):
+            n = int(self.headers.get("Content-Length") or 0)
+            data = self.rfile.read(n) if n else b""
+            with fake.lock:
+                fake.stats["bytes_in"] += len(data)
+            return data
+
+        def _send(self, status, payload=None, content_type="application/json", headers=None):
+            if isinstance(payload, (dict, list)):
+                payload = json.dumps(payload).encode("utf-8")
+            payload = payload or b""
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(payload)))
+            for k, v in (headers or {}).items():
+                self.send_header(k, v)
+            self.end_headers()
+            if self.command != "HEAD":  # HEAD: headers only, or keep-alive framing breaks
+                self.wfile.write(payload)
+
+        def _dispatch(self, method):
+            body = self._body() if method in ("POST", "PUT", "PATCH", "DELETE") else b""
+            status = fake.admit()
+            if status:
+                return self._send(status, {"message": "injected failure"})
+            url = urlparse(self.path)
+            path = unquote(url.path)
+            query = {k: v[0] for k, v in parse_qs(url.query).items()}
+            if path.startswith(REST_PREFIX):
+                return self._rest(method, path[len(REST_PREFIX):], query, body)
+            if path.startswith(STORAGE_PREFIX):
+                return self._storage(method, path[len(STORAGE_PREFIX):], body)
+            if path.startswith(TUS_PREFIX):
+                return self._tus(method, path[len(TUS_PREFIX):].strip("/"), body)
+            self._send(404, {"message": "not found"})
+
+        def do_GET(self):
+            self._dispatch("GET")
+
+        def do_HEAD(self):
+            self._dispatch("HEAD")
+
+        def do_POST(self):
+            self._dispatch("POST")
+
+        def do_PUT(self):
+            self._dispatch("PUT")
+
+        def do_PATCH(self):
+            self._dispatch("PATCH")
+
+        def do_OPTIONS(self):
+            self._dispatch("OPTIONS")
+
+        def do_DELETE(self):
+            self._dispatch("DELETE")
+
+        # --- PostgREST ---
+        def _rest(self, method, table, query, body):
+            rows = fake.tables.get(table)
+            if rows is None:
+                return self._send(404, {"message": f"relation {table} does not exist"})
+            select = query.pop("select", None)
+            query.pop("on_conflict", None)
+            prefer = self.headers.get("Prefer", "")
+            representation = "return=representation" in prefer
+
+            with fake.lock:
+                if method == "GET":
+                    out = [r for r in rows.values() if match_filters(r, query)]
+                    if select and select != "*":
+                        cols = select.split(",")
+                        out = [{c: r.get(c) for c in cols} for r in out]
+                    return self._send(200, out)
+                if method == "POST":
+                    new = json.loads(body or b"[]")
+                    new = new if isinstance(new, list) else [new]
+                    merge = "resolution=merge-duplicates" in prefer
+                    for r in new:
+                        if r.get("id") in rows and not merge:
+                            return self._send(409, {
+                                "code": "23505",
+                                "message": "duplicate key value violates unique constraint",
+                            })
+                    for r in new:
+                        rows.setdefault(r["id"], {}).update(r)
+                    return self._send(201, new if representation else None)
+                if method == "PATCH":
+                    patch = json.loads(body or b"{}")
+                    hit = [r for r in rows.values() if match_filters(r, query)]
+                    for r in hit:
+                        r.update(patch)
+                    return self._send(200 if representation else 204, hit if representation else None)
+                if method == "DELETE":
+                    hit = [k for k, r in rows.items() if match_filters(r, query)]
+                    for k in hit:
+                        del rows[k]
+                    return self._send(204)
+            self._send(405, {"message": "method not allowed"})
+
+        # --- Storage ---
+        def _storage(self, method, rest, body):
+            if rest.startswith("list/") and method == "POST":
+                return self._list(rest[len("list/"):], json.loads(body or b"{}"))
+            public = rest.startswith("public/")
+            if public:
+                rest = rest[len("public/"):]
+            bucket, _, key = rest.partition("/")
+
+            if method in ("GET", "HEAD"):
+                with fake.lock:
+                    obj = fake.objects.get((bucket, key))
+                if obj is None:
+                    return self._send(404, {"message": "Object not found"})
+                headers = {"ETag": obj["etag"], "Accept-Ranges": "bytes"}
+                if obj["cache_control"]:
+                    headers["Cache-Control"] = obj["cache_control"]
+                data, status = obj["data"], 200
+                rng = self.headers.get("Range", "")
+                if rng.startswith("bytes=") and data:
+                    start, _, end = rng[len("bytes="):].partition("-")
+                    start = int(start or 0)
+                    end = min(int(end) if end else len(data) - 1, len(data) - 1)
+                    headers["Content-Range"] = f"bytes {start}-{end}/{len(data)}"
+                    data, status = data[start:end + 1], 206
+                return self._send(status, data, obj["content_type"], headers)
+            with fake.lock:
+                if method in ("POST", "PUT") and not public:
+                    if (bucket, key) in fake.objects and method == "POST" \
+                            and self.headers.get("x-upsert", "false") != "true":
+                        return self._send(400, {"statusCode": "409", "message": "The resource already exists"})
+                    fake.store(bucket, key, body, self.headers.get("Content-Type", "application/octet-stream"),
+                               self.headers.get("Cache-Control", ""))
+                    return self._send(200, {"Key": f"{bucket}/{key}"})
+                if method == "DELETE" and not public:
+                    if key:
+                        names = [key]
+                    else:  # bulk delete: {"prefixes": [...]}
+                        names = json.loads(body or b"{}").get("prefixes", [])
+                    deleted = [n for n in names if fake.objects.pop((bucket, n), None) is not None]
+                    return self._send(200, [{"name": n} for n in deleted])
+            self._send(405, {"message": "method not allowed"})
+
+        def _list(self, bucket, opts):
+            prefix = opts.get("prefix", "").strip("/")
+            limit = int(opts.get("limit", 100))
+            offset = int(opts.get("offset", 0))
+            base = prefix + "/" if prefix else ""
+            entries = {}
+            with fake.lock:
+                for (b, key), obj in sorted(fake.objects.items()):
+                    if b != bucket or not key.startswith(base):
+                        continue
+                    name, sep, _ = key[len(base):].partition("/")
+                    if sep:  # folder placeholder, like Supabase (id is null)
+                        entries.setdefault(name, {"name": name, "id": None, "metadata": None})
+                    else:
+                        entries[name] = {
+                            "name": name,
+                            "id": obj["etag"].strip('"'),
+                            "metadata": {"size": len(obj["data"]), "eTag": obj["etag"],
+                                         "mimetype": obj["content_type"]},
+                        }
+            out = list(entries.values())[offset:offset + limit]
+            self._send(200, out)
+
+        # --- TUS resumable uploads ---
+        def _tus(self, method, upload_id, body):
+            tus = {"Tus-Resumable": "1.0.0"}
+            if method == "OPTIONS":
+                return self._send(204, headers={**tus, "Tus-Version": "1.0.0", "Tus-Extension": TUS_EXTENSIONS,
+                                                "Tus-Checksum-Algorithm": "sha1"})
+            with fake.lock:
+                if method == "POST" and not upload_id:
+                    return self._tus_create(tus)
+                up = fake.uploads.get(upload_id)
+                if up is None:
+                    return self._send(404, headers=tus)
+                if method == "HEAD":
+                    headers = {**tus, "Upload-Offset": str(len(up["data"])), "Cache-Control": "no-store"}
+                    if not up["partial"]:
+                        headers["Upload-Length"] = str(up["length"])
+                    return self._send(200, headers=headers)
+                if method == "DELETE":
+                    del fake.uploads[upload_id]
+                    return self._send(204, headers=tus)
+                if method == "PATCH":
+                    if self.headers.get("Content-Type") != "application/offset+octet-stream":
+                        return self._send(415, headers=tus)
+                    if int(self.headers.get("Upload-Offset", -1)) != len(up["data"]):
+                        return self._send(409, {"message": "offset mismatch"}, headers=tus)
+                    if len(up["data"]) + len(body) > up["length"]:
+                        return self._send(413, headers=tus)
+                    algo, _, digest = (self.headers.get("Upload-Checksum") or "").partition(" ")
+                    if algo == "sha1" and base64.b64encode(hashlib.sha1(body).digest()).decode() != digest:
+                        return self._send(460, {"message": "checksum mismatch"}, headers=tus)
+                    up["data"] += body
+                    if len(up["data"]) == up["length"] and not up["partial"]:
+                        self._tus_finish(up)
+                    return self._send(204, headers={**tus, "Upload-Offset": str(len(up["data"]))})
+            self._send(405, {"message": "method not allowed"})
+
+        def _tus_create(self, tus):
+            meta = tus_metadata(self.headers.get("Upload-Metadata"))
+            concat = self.headers.get("Upload-Concat", "")
+            upload_id = hashlib.sha1(f"{time.time_ns()}-{len(fake.uploads)}".encode()).hexdigest()[:24]
+            up = {"meta": meta, "partial": concat == "partial", "data": bytearray(),
+                  "upsert": self.headers.get("x-upsert", "false") == "true"}
+            if concat.startswith("final;"):
+                parts = [fake.uploads.get(u.rstrip("/").rsplit("/", 1)[-1]) for u in concat[6:].split()]
+                if any(p is None or not p["partial"] or len(p["data"]) != p["length"] for p in parts):
+                    return self._send(400, {"message": "incomplete partial upload"}, headers=tus)
+                up["data"] = bytearray(b"".join(p["data"] for p in parts))
+                up["length"] = len(up["data"])
+            else:
+                up["length"] = int(self.headers.get("Upload-Length", -1))
+                if up["length"] < 0:
+                    return self._send(400, {"message": "Upload-Length required"}, headers=tus)
+            if not up["partial"]:
+                key = (meta.get("bucketName", ""), meta.get("objectName", ""))
+                if not all(key):
+                    return self._send(400, {"message": "bucketName and objectName required"}, headers=tus)
+                if key in fake.objects and not up["upsert"]:
+                    return self._send(409, {"message": "The resource already exists"}, headers=tus)
+            fake.uploads[upload_id] = up
+            if concat.startswith("final;") or up["length"] == 0:
+                self._tus_finish(up)
+            host = self.headers.get("Host", "127.0.0.1")
+            return self._send(201, headers={**tus, "Location": f"http://{host}{TUS_PREFIX}/{upload_id}",
+                                            "Upload-Offset": str(len(up["data"]))})
+
+        def _tus_finish(self, up):
+            meta = up["meta"]
+            fake.store(meta["bucketName"], meta["objectName"], up["data"],
+                       meta.get("contentType", "application/octet-stream"), meta.get("cacheControl", ""))
+
+    return Handler
+
+
+def start_server(host="127.0.0.1", port=0, **config):
+    """Start the stand-in on a background thread. Returns (fake, server, base_url)."""
+    fake = FakeSupabase(**config)
+    server = ThreadingHTTPServer((host, port), make_handler(fake))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return fake, server, f"http://{host}:{server.server_address[1]}"
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Local Supabase stand-in")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=54321)
+    ap.add_argument("--latency", type=float, default=0.0, help="base seconds per request")
+    ap.add_argument("--jitter", type=float, default=0.0, help="extra random seconds per request")
+    ap.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests failing with 503")
+    ap.add_argument("--rate-limit", type=int, default=0, help="requests/sec before 429 (0 = off)")
+    ap.add_argument("--seed-papers", help="preload rows from a papers JSON file")
+    args = ap.parse_args()
+
+    fake, server, url = start_server(
+        args.host, args.port, latency=args.latency, jitter=args.jitter,
+        error_rate=args.error_rate, rate_limit=args.rate_limit,
+    )
+    if args.seed_papers:
+        with open(args.seed_papers) as f:
+            for p in json.load(f):
+                fake.tables["pastpaper_papers"][p["id"]] = p
+    print(f"Local Supabase stand-in at {url} (Ctrl-C to stop)")
+    try:
+        while True:
+            time.sleep(5)
+            print(f"  {fake.stats}")
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Single-pass coverage of the image store against the paper database.
+Scans every folder under IMAGES_DIR once (os.scandir), builds a
+(folder, index) -> paper index and reports, per folder:
+  - mapped:   images matched to a DB paper
+  - missing:  images whose paper number has no DB row yet
+  - orphaned: images with no paper slot (extra pages, unknown folders)
+  - unplaced: DB papers with no image
+The result is cached as JSON; generate_mapping.py and collect_missing.py
+reuse it instead of rescanning.
+"""
+
+import argparse
+import json
+import math
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+import sources
+
+PAPERS_JSON = "data/pastpaper_papers.json"
+IMAGES_DIR = "data/images"
+COVERAGE_JSON = "data/page_coverage.json"
+
+# Image folder -> {prefix, year, mode}; see sources.py for the match modes
+FOLDERS = sources.FOLDERS
+PREFIX_TO_FOLDER = sources.PREFIX_TO_FOLDER
+
+PAGE_RE = re.compile(r"^page-(\d+)\.webp$")
+
+
+def sort_key(p):
+    parts = p["paper_number"].split(".")
+    return (float(parts[0]), float(parts[1]) if len(parts) > 1 else 0)
+
+
+def generate_full_sequence(num_images):
+    """
+    Generate the full paper number sequence for a given number of images.
+    DSE papers follow X.1, X.2, X.3 pattern per group.
+    """
+    num_groups = math.ceil(num_images / 3)
+    seq = []
+    for g in range(1, num_groups + 1):
+        for s in range(1, 4):  # .1, .2, .3
+            seq.append(f"{g}.{s}")
+            if len(seq) == num_images:
+                return seq
+    return seq
+
+
+def scan_folder(path):
+    """Return (sorted page images, stray .webp files, mtime_ns) for one folder."""
+    pages, stray = [], []
+    with os.scandir(path) as it:
+        for entry in it:
+            if not entry.name.endswith(".webp") or not entry.is_file():
+                continue
+            m = PAGE_RE.match(entry.name)
+            if m:
+                pages.append((int(m.group(1)), entry.name))
+            else:
+                stray.append(entry.name)
+    pages.sort()
+    return [name for _, name in pages], sorted(stray), os.stat(path).st_mtime_ns
+
+
+def scan_store(images_dir=IMAGES_DIR, workers=8):
+    """Scan every image folder once, in parallel. Returns folder -> scan result."""
+    if not os.path.isdir(images_dir):
+        return {}
+    with os.scandir(images_dir) as it:
+        folders = sorted(e.name for e in it if e.is_dir())
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = pool.map(scan_folder, [os.path.join(images_dir, f) for f in folders])
+    return dict(zip(folders, results))
+
+
+def fingerprint(scan, papers_json=PAPERS_JSON, folders=FOLDERS):
+    fp = {f: mtime for f, (_, _, mtime) in scan.items()}
+    fp["__papers__"] = os.stat(papers_json).st_mtime_ns if os.path.exists(papers_json) else 0
+    fp["__folders__"] = folders  # a changed rule in sources.py invalidates the cache
+    return fp
+
+
+def build_coverage(papers, scan, folders=FOLDERS):
+    """Match scanned images to papers. Pure function of its inputs."""
+    by_prefix = {}
+    for p in papers:
+        by_prefix.setdefault(p["paper_id"].rsplit("-", 1)[0], []).append(p)
+    for plist in by_prefix.values():
+        plist.sort(key=sort_key)
+
+    report = {}
+    index = []
+    placed = set()
+
+    for folder, (imgs, stray, _) in sorted(scan.items()):
+        info = folders.get(folder)
+        entry = {"mapped": 0, "missing": [], "orphaned": [f"{folder}/{s}" for s in stray]}
+        if info is None:
+            entry["orphaned"] += [f"{folder}/{img}" for img in imgs]
+            report[folder] = entry
+            continue
+        entry.update(prefix=info["prefix"], year=info["year"], mode=info["mode"], images=len(imgs))
+        folder_papers = by_prefix.get(info["prefix"], [])
+
+        if info["mode"] == "sequence":
+            lookup = {p["paper_number"]: p for p in folder_papers}
+            slots = list(zip(imgs, generate_full_sequence(len(imgs))))
+        else:
+            slots = [(img, p["paper_number"]) for img, p in zip(imgs, folder_papers)]
+            lookup = {p["paper_number"]: p for p in folder_papers}
+            entry["orphaned"] += [f"{folder}/{img}" for img in imgs[len(folder_papers):]]
+
+        for i, (img, paper_num) in enumerate(slots, start=1):
+            rec = {
+                "folder": folder,
+                "index": i,
+                "image": f"{folder}/{img}",
+                "paper_number": paper_num,
+                "paper_id": f"{info['prefix']}-{paper_num}",
+                "year": info["year"],
+            }
+            p = lookup.get(paper_num)
+            if p:
+                rec.update(status="mapped", db_id=p["id"], topic=p["topic"])
+                entry["mapped"] += 1
+                placed.add(p["paper_id"])
+            else:
+                rec["status"] = "missing"
+                entry["missing"].append(rec["paper_id"])
+            index.append(rec)
+        report[folder] = entry
+
+    for folder, info in folders.items():
+        if folder not in scan:
+            report[folder] = {"prefix": info["prefix"], "year": info["year"], "mode": info["mode"],
+                              "images": 0, "mapped": 0, "missing": [], "orphaned": []}
+    known = {info["prefix"]: folder for folder, info in folders.items()}
+    for prefix, plist in by_prefix.items():
+        unplaced = [p["paper_id"] for p in plist if p["paper_id"] not in placed]
+        if unplaced:
+            report.setdefault(known.get(prefix, prefix), {}).setdefault("unplaced", []).extend(unplaced)
+
+    return {"folders": report, "index": index}
+
+
+def load_coverage(rebuild=False, workers=8):
+    """Return the cached coverage, rebuilding it if the store or DB changed."""
+    scan = scan_store(IMAGES_DIR, workers)
+    fp = fingerprint(scan)
+    if not rebuild and os.path.exists(COVERAGE_JSON):
+        with open(COVERAGE_JSON) as f:
+            cached = json.load(f)
+        if cached.get("fingerprint") == fp:
+            return cached
+
+    with open(PAPERS_JSON) as f:
+        papers = json.load(f)
+    coverage = build_coverage(papers, scan)
+    coverage["fingerprint"] = fp
+    with open(COVERAGE_JSON, "w", encoding="utf-8") as f:
+        json.dump(coverage, f, indent=2, ensure_ascii=False)
+    return coverage
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Report image/paper coverage for every folder")
+    ap.add_argument("--rebuild", action="store_true", help="ignore the cached coverage JSON")
+    ap.add_argument("--workers", type=int, default=8, help="folders scanned in parallel")
+    args = ap.parse_args()
+
+    coverage = load_coverage(rebuild=args.rebuild, workers=args.workers)
+    totals = {"images": 0, "mapped": 0, "missing": 0, "orphaned": 0, "unplaced": 0}
+    for folder, e in sorted(coverage["folders"].items()):
+        counts = {
+            "images": e.get("images", 0), "mapped": e.get("mapped", 0),
+            "missing": len(e.get("missing", [])), "orphaned": len(e.get("orphaned", [])),
+            "unplaced": len(e.get("unplaced", [])),
+        }
+        for k, v in counts.items():
+            totals[k] += v
+        flag = "" if counts["missing"] == counts["orphaned"] == counts["unplaced"] == 0 else "  <--"
+        print(f"  {folder:<14} {counts['images']:>3} images  {counts['mapped']:>3} mapped  "
+              f"{counts['missing']:>3} missing  {counts['orphaned']:>3} orphaned  "
+              f"{counts['unplaced']:>3} unplaced{flag}")
+
+    print(f"\nTotal: {totals['images']} images, {totals['mapped']} mapped, {totals['missing']} missing, "
+          f"{totals['orphaned']} orphaned, {totals['unplaced']} unplaced")
+    print(f"Coverage JSON: {COVERAGE_JSON}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Shared SQL literal helpers for pastpaper_papers statements.
+Uses the same ARRAY[] / E'' syntax as gen_mcp_sql.py so the output
+can be pasted into MCP execute_sql or run through psql unchanged.
+"""
+
+import json
+
+TABLE = "pastpaper_papers"
+
+# Columns that carry paper content (everything except bookkeeping fields)
+CONTENT_COLUMNS = [
+    "year", "paper_number", "paper_id", "topic",
+    "part_a_title", "part_a_source", "part_a_article",
+    "part_a_discussion_points", "part_b_questions",
+]
+
+ALL_COLUMNS = ["id"] + CONTENT_COLUMNS + ["created_at", "updated_at"]
+
+TEXT_ARRAY_COLUMNS = {"part_a_article", "part_a_discussion_points", "page_images"}
+JSONB_COLUMNS = {"part_b_questions"}
+
+
+def esc(s):
+    """Escape a string for PostgreSQL E'' literal."""
+    if s is None:
+        return "NULL"
+    escaped = str(s).replace("'", "''").replace("\\", "\\\\")
+    return "E'" + escaped + "'"
+
+
+def esc_simple(s):
+    """Simple escape for strings without special chars."""
+    if s is None:
+        return "NULL"
+    return "'" + str(s).replace("'", "''") + "'"
+
+
+def text_array(arr):
+    """Convert list to ARRAY[E'...', E'...'] syntax."""
+    if not arr:
+        return "ARRAY[]::text[]"
+    return "ARRAY[" + ", ".join(esc(item) for item in arr) + "]"
+
+
+def jsonb_val(obj):
+    """Convert Python object to jsonb literal."""
+    s = json.dumps(obj, ensure_ascii=False).replace("'", "''")
+    return "'" + s + "'::jsonb"
+
+
+def literal(col, value):
+    """Render one column value as a SQL literal."""
+    if col in TEXT_ARRAY_COLUMNS:
+        return text_array(value or [])
+    if col in JSONB_COLUMNS:
+        return jsonb_val(value if value is not None else [])
+    if col == "year":
+        return str(int(value))
+    if col in ("id", "paper_number", "paper_id", "created_at", "updated_at"):
+        return esc_simple(value)
+    return esc(value)
+
+
+def insert_sql(p, columns=ALL_COLUMNS):
+    cols = [c for c in columns if c in p]
+    vals = ", ".join(literal(c, p[c]) for c in cols)
+    return f"INSERT INTO {TABLE} ({', '.join(cols)}) VALUES ({vals})"
+
+
+def update_sql(p, columns):
+    sets = ", ".join(f"{c} = {literal(c, p.get(c))}" for c in columns)
+    return f"UPDATE {TABLE} SET {sets} WHERE id = {esc_simple(p['id'])}"
+
+
+def delete_sql(ids):
+    id_list = ", ".join(esc_simple(i) for i in ids)
+    return f"DELETE FROM {TABLE} WHERE id IN ({id_list})"
+
+
+def upsert_sql(p, columns=ALL_COLUMNS):
+    """INSERT that is safe to re-run: content wins, created_at is kept."""
+    cols = [c for c in columns if c in p]
+    vals = ", ".join(literal(c, p[c]) for c in cols)
+    sets = ", ".join(f"{c} = EXCLUDED.{c}" for c in cols if c not in ("id", "created_at"))
+    return (
+        f"INSERT INTO {TABLE} ({', '.join(cols)}) VALUES ({vals}) "
+        f"ON CONFLICT (id) DO UPDATE SET {sets}"
+    )
@@ -2,79 +2,379 @@
 """
 Convert DSE Speaking Past Paper PDFs to WebP images.
 Only keeps specified pages per file (odd pages for some, all for others).
+
+--tiles also renders a deep-zoom tile pyramid per page, each level drawn
+straight from the vector PDF. Tiles go to {key}/page-NN_files/{level}/
+{col}_{row}.webp with a page-NN.tiles.json manifest next to the page.
+generate_mapping.py records the manifest as the entry's "tiles" key and
+upload_images.py publishes the tree and lists it in the folder manifest.
+A page re-rendered without --tiles drops its old pyramid.
+
+--vector also exports each page as SVG and as a single-page PDF, keeps
+whichever of raster/SVG/PDF is smallest as the preferred format, and
+writes a page-NN.text.json overlay of text spans (page-relative bboxes)
+so text stays selectable over any of them. A kept SVG/PDF and the overlay
+become the mapping's "vector" / "text_layer" keys, which upload_images.py
+publishes as the page's preferred variant.
+
+--crop trims each page to its content: the union of text, drawing and
+image bboxes, ignoring running headers/footers and page frames, plus a
+small pad. CROP_OVERRIDES can pin the region per image. Crop boxes (PDF
+points) are recorded in crop_boxes.json for the mapping and the image
+report; tiles, SVG/PDF exports and text overlays use the same box.
 """
 
-import fitz  # pymupdf
+import argparse
+import math
 import os
 import json
+import shutil
+
+import config
+import sources
+from raster_cache import RasterCache, CACHE_DIR
+
+# Source PDFs live outside the repo: DSE_PDF_DIR in the env or .env.local
+PDF_DIR = config.get("DSE_PDF_DIR", os.path.expanduser("~/Desktop/dsepastpaper"))
+OUTPUT_DIR = "data/images"
 
-PDF_DIR = "/Users/randy/Desktop/dsepastpaper"
-OUTPUT_DIR = "/Users/randy/dsespeakingweb/data/images"
-
-# Page rules: "odd" = odd pages only, "all" = all pages
-PDF_RULES = {
-    "2012 Practice Paper.pdf": {"key": "2012-practice", "pages": "odd"},
-    "2012 Sample Paper.pdf":   {"key": "2012-sample",   "pages": "all"},
-    "2012.pdf":                {"key": "2012",           "pages": "odd"},
-    "2013.pdf":                {"key": "2013",           "pages": "odd"},
-    "2014.pdf":                {"key": "2014",           "pages": "all"},
-    "2015.pdf":                {"key": "2015",           "pages": "odd"},
-    "2016.pdf":                {"key": "2016",           "pages": "all"},
-    "2017.pdf":                {"key": "2017",           "pages": "all"},
-    "2018.pdf":                {"key": "2018",           "pages": "all"},
-    "2019.pdf":                {"key": "2019",           "pages": "all"},
-    "2023.pdf":                {"key": "2023",           "pages": "odd"},
-    "2024.pdf":                {"key": "2024",           "pages": "odd"},
-    "2025 P4.pdf":             {"key": "2025",           "pages": "odd"},
-}
+# Page rules ("odd" = odd pages only, "all" = all pages) come from the
+# source registry: PDF name -> {"key": image folder, "pages": rule}
+PDF_RULES = sources.PDF_RULES
 
 DPI = 200  # Resolution
 QUALITY = 85  # WebP quality
 
+# Deep-zoom tiles (--tiles)
+TILE_SIZE = 256
+TILE_OVERLAP = 1  # px shared with neighbours, hides seams when scaled
+TILE_MAX_DPI = 400  # top level; each lower level halves until one tile fits
+TILE_QUALITY = 80
+
+# Content cropping (--crop)
+CROP_PAD = 12  # pt of margin kept around the content
+CROP_HEADER = 0.06  # top fraction of the page: items entirely inside are running headers
+CROP_FOOTER = 0.05  # bottom fraction: page numbers / footers
+CROP_FRAME = 0.9  # drawings covering this much of the page are frames, not content
+CROP_FILE = os.path.join(os.path.dirname(OUTPUT_DIR), "crop_boxes.json")
+
+# key -> {img_index: {"clip": [x0, y0, x1, y1] (pt)}}
+# One image is always one PDF page: the mapping assigns papers per image,
+# so a paper spanning pages cannot be stitched into one image here.
+CROP_OVERRIDES = {}
+
+
+raster_cache = None  # set in main() unless --no-cache
+
+# fitz (pymupdf) and PIL are imported inside the functions that render, so
+# importing this module for PDF_RULES / kept_pages stays cheap.
+
+
+def pixmap_to_image(pix):
+    """Wrap a pymupdf Pixmap as a PIL image without a PNG round-trip."""
+    from PIL import Image
+    mode = "RGBA" if pix.alpha else "RGB"
+    return Image.frombytes(mode, (pix.width, pix.height), pix.samples)
+
+
+def render_page(page, zoom):
+    """Rasterize a page at zoom as a PIL image, via the raster cache if enabled."""
+    import fitz  # pymupdf
+    from PIL import Image
+
+    if raster_cache is None:
+        return pixmap_to_image(page.get_pixmap(matrix=fitz.Matrix(zoom, zoom)))
+    key = raster_cache.key(page, zoom)
+    hit = raster_cache.get(key)
+    if hit:
+        mode, width, height, samples = hit
+        return Image.frombytes(mode, (width, height), samples)
+    pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom))
+    raster_cache.put(key, pix.width, pix.height, pix.n, pix.samples)
+    return pixmap_to_image(pix)
+
+
+def render_tiles(page, out_dir, stem, clip=None):
+    """
+    Render a tile pyramid for one page (or its clip rect). Level 0 is the
+    smallest (fits in a single tile); the last level is TILE_MAX_DPI.
+    Returns the manifest path.
+    """
+    clip = clip or page.rect
+    top_zoom = TILE_MAX_DPI / 72.0
+    full_w = math.ceil(clip.width * top_zoom)
+    full_h = math.ceil(clip.height * top_zoom)
+    num_levels = max(1, math.ceil(math.log2(max(full_w, full_h) / TILE_SIZE)) + 1)
+
+    levels = []
+    tiles_dir = os.path.join(out_dir, f"{stem}_files")
+    shutil.rmtree(tiles_dir, ignore_errors=True)  # a new pyramid may have fewer levels
+    for level in range(num_levels):
+        zoom = top_zoom / 2 ** (num_levels - 1 - level)
+        img = render_clip(page, clip, zoom)
+        cols = math.ceil(img.width / TILE_SIZE)
+        rows = math.ceil(img.height / TILE_SIZE)
+
+        level_dir = os.path.join(tiles_dir, str(level))
+        os.makedirs(level_dir, exist_ok=True)
+        for row in range(rows):
+            for col in range(cols):
+                x0 = max(0, col * TILE_SIZE - TILE_OVERLAP)
+                y0 = max(0, row * TILE_SIZE - TILE_OVERLAP)
+                x1 = min(img.width, (col + 1) * TILE_SIZE + TILE_OVERLAP)
+                y1 = min(img.height, (row + 1) * TILE_SIZE + TILE_OVERLAP)
+                img.crop((x0, y0, x1, y1)).save(
+                    os.path.join(level_dir, f"{col}_{row}.webp"), "WEBP", quality=TILE_QUALITY
+                )
+
+        levels.append({
+            "level": level,
+            "dpi": round(zoom * 72, 2),
+            "width": img.width,
+            "height": img.height,
+            "cols": cols,
+            "rows": rows,
+        })
+
+    manifest = {
+        "width": full_w,
+        "height": full_h,
+        "tile_size": TILE_SIZE,
+        "overlap": TILE_OVERLAP,
+        "format": "webp",
+        "tiles": f"{stem}_files/{{level}}/{{col}}_{{row}}.webp",
+        "levels": levels,
+    }
+    manifest_path = os.path.join(out_dir, f"{stem}.tiles.json")
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest_path
+
+
+def clear_tiles(out_dir, stem):
+    """Remove a page's pyramid so it cannot outlive the page it was cut from."""
+    shutil.rmtree(os.path.join(out_dir, f"{stem}_files"), ignore_errors=True)
+    if os.path.exists(os.path.join(out_dir, f"{stem}.tiles.json")):
+        os.remove(os.path.join(out_dir, f"{stem}.tiles.json"))
+
+
+def clear_vector(out_dir, stem, keep_text=False):
+    """Remove a page's SVG/PDF export (and text overlay unless keep_text)."""
+    for ext in ("svg", "pdf") + (() if keep_text else ("text.json",)):
+        path = os.path.join(out_dir, f"{stem}.{ext}")
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def page_sidecars(image):
+    """
+    Files rendered next to an image, as paths relative to OUTPUT_DIR:
+    "tiles" (tile manifest), "vector" (SVG/PDF kept as smaller than the
+    WebP) and "text_layer" (text overlay).
+    """
+    stem = image[:-len(".webp")]
+    found = {}
+    if os.path.exists(os.path.join(OUTPUT_DIR, f"{stem}.tiles.json")):
+        found["tiles"] = f"{stem}.tiles.json"
+    for ext in ("svg", "pdf"):
+        if os.path.exists(os.path.join(OUTPUT_DIR, f"{stem}.{ext}")):
+            found["vector"] = f"{stem}.{ext}"
+    if os.path.exists(os.path.join(OUTPUT_DIR, f"{stem}.text.json")):
+        found["text_layer"] = f"{stem}.text.json"
+    return found
+
+
+def extract_text_layer(page):
+    """Text spans with bboxes as fractions of the page size, for a selectable overlay."""
+    w, h = page.rect.width, page.rect.height
+    spans = []
+    for block in page.get_text("dict")["blocks"]:
+        for line in block.get("lines", []):
+            for span in line["spans"]:
+                text = span["text"]
+                if not text.strip():
+                    continue
+                x0, y0, x1, y1 = span["bbox"]
+                spans.append({
+                    "text": text,
+                    "bbox": [round(x0 / w, 4), round(y0 / h, 4), round(x1 / w, 4), round(y1 / h, 4)],
+                    "size": round(span["size"] / h, 4),
+                })
+    return {"width": w, "height": h, "spans": spans}
+
+
+def render_vector(doc, page_num, out_dir, stem, raster_bytes, clip=None):
+    """
+    Export a page (cropped to clip, if given) as SVG and as a single-page
+    PDF, keep the smallest of raster/SVG/PDF and write the text overlay.
+    Returns a result dict.
+    """
+    import fitz  # pymupdf
+
+    single = fitz.open()
+    single.insert_pdf(doc, from_page=page_num, to_page=page_num)
+    page = single[0]
+    if clip is not None:
+        page.set_cropbox(clip)  # SVG, PDF and text coordinates all follow the crop box
+    svg = page.get_svg_image(matrix=fitz.Identity).encode("utf-8")
+    pdf = single.tobytes(garbage=4, deflate=True, clean=True)
+
+    sizes = {"webp": raster_bytes, "svg": len(svg), "pdf": len(pdf)}
+    preferred = min(sizes, key=sizes.get)
+    result = {"preferred": preferred, "bytes": sizes}
+    clear_vector(out_dir, stem, keep_text=True)  # a smaller format from an earlier run
+    if preferred != "webp":
+        with open(os.path.join(out_dir, f"{stem}.{preferred}"), "wb") as f:
+            f.write(svg if preferred == "svg" else pdf)
+
+    text_path = os.path.join(out_dir, f"{stem}.text.json")
+    with open(text_path, "w", encoding="utf-8") as f:
+        json.dump(extract_text_layer(page), f, ensure_ascii=False, separators=(",", ":"))
+    single.close()
+    return result
+
+
+def content_bbox(page):
+    """Bounding box (PDF points) of the page's content, without headers, footers and frames."""
+    import fitz  # pymupdf
+
+    area = page.rect
+    top = area.y0 + area.height * CROP_HEADER
+    bottom = area.y1 - area.height * CROP_FOOTER
+    rects = [fitz.Rect(b[:4]) for b in page.get_text("blocks") if b[4].strip()]
+    rects += [fitz.Rect(i["bbox"]) for i in page.get_image_info()]
+    rects += [d["rect"] for d in page.get_drawings()
+              if d["rect"].width * d["rect"].height < CROP_FRAME * area.width * area.height]
+
+    box = None
+    for r in rects:
+        if r.is_empty or r.y1 <= top or r.y0 >= bottom:
+            continue
+        box = r if box is None else box | r
+    if box is None:
+        return area
+    return (box + (-CROP_PAD, -CROP_PAD, CROP_PAD, CROP_PAD)) & area
+
+
+def render_clip(page, rect, zoom):
+    """Rasterize page and cut out rect (PDF points)."""
+    img = render_page(page, zoom)
+    if rect == page.rect:
+        return img
+    x0, y0 = page.rect.x0, page.rect.y0
+    return img.crop((
+        max(0, math.floor((rect.x0 - x0) * zoom)), max(0, math.floor((rect.y0 - y0) * zoom)),
+        min(img.width, math.ceil((rect.x1 - x0) * zoom)), min(img.height, math.ceil((rect.y1 - y0) * zoom)),
+    ))
+
+
+def crop_rect(page, override):
+    import fitz  # pymupdf
+
+    return fitz.Rect(override["clip"]) & page.rect if "clip" in override else content_bbox(page)
+
+
+def save_crop_boxes(results):
+    """Record {image: {"page", "box"}} in CROP_FILE; uncropped re-renders drop their entry."""
+    boxes = {}
+    if os.path.exists(CROP_FILE):
+        with open(CROP_FILE) as f:
+            boxes = json.load(f)
+    elif not any("crop" in r for r in results):
+        return
+    for r in results:
+        if "crop" in r:
+            boxes[r["image"]] = r["crop"]
+        else:
+            boxes.pop(r["image"], None)
+    with open(CROP_FILE, "w", encoding="utf-8") as f:
+        json.dump(boxes, f, indent=1)
+
+
+def kept_pages(total_pages, page_rule):
+    """Yield (0-indexed page_num, 1-indexed output image index) for pages to keep."""
+    img_index = 1
+    for page_num in range(total_pages):
+        # page_num is 0-indexed, actual page is page_num + 1
+        if page_rule == "odd" and (page_num + 1) % 2 == 0:
+            continue  # Skip even pages
+        yield page_num, img_index
+        img_index += 1
+
+
+def convert_pdf(pdf_path, key, page_rule, tiles=False, vector=False, only=None, crop=False):
+    """
+    Convert a PDF to WebP images, returns list of (original_page, output_path).
+    only: optional set of 0-indexed page numbers to (re)render; others are skipped.
+    crop: trim to content_bbox / CROP_OVERRIDES (raster, tiles and vector alike);
+    results carry "crop" and "pixels".
+    """
+    import fitz  # pymupdf
 
-def convert_pdf(pdf_path, key, page_rule):
-    """Convert a PDF to WebP images, returns list of (original_page, output_path)."""
     doc = fitz.open(pdf_path)
     total_pages = len(doc)
     out_dir = os.path.join(OUTPUT_DIR, key)
     os.makedirs(out_dir, exist_ok=True)
 
     results = []
-    img_index = 1
 
-    for page_num in range(total_pages):
-        # page_num is 0-indexed, actual page is page_num + 1
+    for page_num, img_index in kept_pages(total_pages, page_rule):
+        if only is not None and page_num not in only:
+            continue
         actual_page = page_num + 1
-
-        if page_rule == "odd" and actual_page % 2 == 0:
-            continue  # Skip even pages
-
         page = doc[page_num]
         # Render at specified DPI
         zoom = DPI / 72.0
-        mat = fitz.Matrix(zoom, zoom)
-        pix = page.get_pixmap(matrix=mat)
+        clip = crop_rect(page, CROP_OVERRIDES.get(key, {}).get(img_index, {})) if crop else None
+        img = render_clip(page, clip, zoom) if crop else render_page(page, zoom)
 
-        out_file = os.path.join(out_dir, f"page-{img_index:02d}.webp")
+        stem = f"page-{img_index:02d}"
+        out_file = os.path.join(out_dir, f"{stem}.webp")
         # Save as WebP via PIL
-        from PIL import Image
-        import io
-        img_data = pix.tobytes("png")
-        img = Image.open(io.BytesIO(img_data))
         img.save(out_file, "WEBP", quality=QUALITY)
 
-        results.append({
+        result = {
             "original_page": actual_page,
-            "image": f"{key}/page-{img_index:02d}.webp",
+            "image": f"{key}/{stem}.webp",
             "file": out_file,
-        })
-        img_index += 1
+        }
+        if crop:
+            result["crop"] = {"page": actual_page, "box": [round(v, 1) for v in clip]}
+            full = math.ceil(page.rect.width * zoom) * math.ceil(page.rect.height * zoom)
+            result["pixels"] = (full, img.width * img.height)
+        if tiles:
+            render_tiles(page, out_dir, stem, clip)
+            result["tiles"] = f"{key}/{stem}.tiles.json"
+        else:
+            clear_tiles(out_dir, stem)
+        if vector:
+            v = render_vector(doc, page_num, out_dir, stem, os.path.getsize(out_file), clip)
+            result["preferred"] = f"{key}/{stem}.{v['preferred']}"
+            result["text_layer"] = f"{key}/{stem}.text.json"
+            result["bytes"] = v["bytes"]
+        else:
+            clear_vector(out_dir, stem)
+        results.append(result)
 
     doc.close()
     return results
 
 
 def main():
+    ap = argparse.ArgumentParser(description="Convert past paper PDFs to WebP pages")
+    ap.add_argument("--tiles", action="store_true", help="also render deep-zoom tile pyramids")
+    ap.add_argument("--vector", action="store_true",
+                    help="also export SVG/PDF pages and text overlays, keeping the smallest format")
+    ap.add_argument("--crop", action="store_true",
+                    help="crop pages to their content (see CROP_OVERRIDES) and record crop boxes")
+    ap.add_argument("--no-cache", action="store_true", help="always rasterize, skip the raster cache")
+    ap.add_argument("--cache-dir", default=CACHE_DIR, help="raster cache location")
+    args = ap.parse_args()
+
+    global raster_cache
+    if not args.no_cache:
+        raster_cache = RasterCache(args.cache_dir)
+
     all_results = {}
     total_images = 0
 
@@ -88,10 +388,28 @@ def main():
         page_rule = rule["pages"]
         print(f"Processing {pdf_name} -> {key}/ ({page_rule} pages)...")
 
-        results = convert_pdf(pdf_path, key, page_rule)
+        results = convert_pdf(pdf_path, key, page_rule, tiles=args.tiles, vector=args.vector,
+                              crop=args.crop)
         all_results[key] = results
         total_images += len(results)
         print(f"  -> {len(results)} images")
+        if args.crop:
+            full = sum(r["pixels"][0] for r in results)
+            cropped = sum(r["pixels"][1] for r in results)
+            print(f"     cropped: {full / 1e6:.1f} -> {cropped / 1e6:.1f} Mpx "
+                  f"({(1 - cropped / full) * 100 if full else 0:.0f}% fewer pixels)")
+        save_crop_boxes(results)
+        if args.vector:
+            picked = [r["preferred"].rsplit(".", 1)[1] for r in results]
+            raster = sum(r["bytes"]["webp"] for r in results)
+            best = sum(min(r["bytes"].values()) for r in results)
+            print(f"     preferred: {picked.count('webp')} webp, {picked.count('svg')} svg, "
+                  f"{picked.count('pdf')} pdf ({raster // 1024} KB -> {best // 1024} KB)")
+
+    if raster_cache is not None:
+        freed = raster_cache.evicted
+        print(f"\nRaster cache: {raster_cache.hits} hits, {raster_cache.misses} misses"
+              + (f", evicted {freed / 1024 / 1024:.1f} MB" if freed else ""))
 
     # Generate mapping template
     template = []
@@ -100,6 +418,9 @@ def main():
             "pdf_key": key,
             "total_images": len(results),
             "images": [r["image"] for r in results],
+            **({"tiles": [r["tiles"] for r in results]} if args.tiles else {}),
+            **({"preferred": [r["preferred"] for r in results],
+                "text_layers": [r["text_layer"] for r in results]} if args.vector else {}),
             "papers": [
                 {
                     "paper_id": "FILL_IN",
@@ -109,9 +430,7 @@ def main():
             ]
         })
 
-    template_path = os.path.join(
-        "/Users/randy/dsespeakingweb/data", "page_mapping_template.json"
-    )
+    template_path = os.path.join("data", "page_mapping_template.json")
     with open(template_path, "w", encoding="utf-8") as f:
         json.dump(template, f, indent=2, ensure_ascii=False)
 
@@ -8,19 +8,11 @@ import json
 import os
 from collections import defaultdict
 
-MAPPING_FILE = "/Users/randy/dsespeakingweb/data/paper_page_mapping.json"
-IMAGES_DIR = "/Users/randy/dsespeakingweb/data/images"
-OUTPUT_HTML = "/Users/randy/dsespeakingweb/data/mapping_preview.html"
+MAPPING_FILE = "data/paper_page_mapping.json"
+IMAGES_DIR = "data/images"
+OUTPUT_HTML = "data/mapping_preview.html"
 
-with open(MAPPING_FILE) as f:
-    mapping = json.load(f)
-
-# Group by year
-by_year = defaultdict(list)
-for entry in mapping:
-    by_year[entry["year"]].append(entry)
-
-html = """<!DOCTYPE html>
+HTML_HEAD = """<!DOCTYPE html>
 <html><head>
 <meta charset="utf-8">
 <title>Paper-Image Mapping Preview</title>
@@ -44,7 +36,8 @@ html = """<!DOCTYPE html>
 </head><body>
 <h1>Paper-Image Mapping Preview</h1>
 <div class="summary">
-  <p>Total mappings: <span>""" + str(len(mapping)) + """</span></p>
+  <p>Total mappings: <span>"""
+HTML_INTRO = """</span></p>
   <p>Verify: the paper number printed on the image (top-right corner of each exam sheet) should match the paper_number shown below it.</p>
 </div>
 <div class="tip">
@@ -53,35 +46,55 @@ html = """<!DOCTYPE html>
 </div>
 """
 
-for year in sorted(by_year.keys()):
-    entries = by_year[year]
-    html += f'<h2>{year} ({len(entries)} papers mapped)</h2>\n'
-    html += '<div class="grid">\n'
-
-    for entry in entries:
-        img_path = entry.get("image")
-
-        if img_path:
-            abs_img = os.path.join(IMAGES_DIR, img_path)
-            img_url = f"file://{abs_img}"
-            img_tag = f'<img src="{img_url}" loading="lazy">'
-        else:
-            img_tag = '<div style="height:200px;background:#fee;display:flex;align-items:center;justify-content:center;color:red;">NO IMAGE</div>'
-
-        html += f'''  <div class="card ok">
+CARD = """  <div class="card ok">
     {img_tag}
     <div class="info">
-      <div class="pid">{entry["paper_id"]} &mdash; {entry["paper_number"]}</div>
-      <div class="topic">{entry["topic"]}</div>
-      <div class="file">{img_path or "N/A"}</div>
+      <div class="pid">{paper_id} &mdash; {paper_number}</div>
+      <div class="topic">{topic}</div>
+      <div class="file">{file}</div>
     </div>
-  </div>\n'''
+  </div>
+"""
+
+
+def main():
+    with open(MAPPING_FILE) as f:
+        mapping = json.load(f)
+
+    # Group by year
+    by_year = defaultdict(list)
+    for entry in mapping:
+        by_year[entry["year"]].append(entry)
+
+    html = HTML_HEAD + str(len(mapping)) + HTML_INTRO
+
+    for year in sorted(by_year.keys()):
+        entries = by_year[year]
+        html += f'<h2>{year} ({len(entries)} papers mapped)</h2>\n'
+        html += '<div class="grid">\n'
+
+        for entry in entries:
+            img_path = entry.get("image")
+
+            if img_path:
+                abs_img = os.path.abspath(os.path.join(IMAGES_DIR, img_path))
+                img_url = f"file://{abs_img}"
+                img_tag = f'<img src="{img_url}" loading="lazy">'
+            else:
+                img_tag = '<div style="height:200px;background:#fee;display:flex;align-items:center;justify-content:center;color:red;">NO IMAGE</div>'
+
+            html += CARD.format(img_tag=img_tag, paper_id=entry["paper_id"], paper_number=entry["paper_number"],
+                                topic=entry["topic"], file=img_path or "N/A")
+
+        html += '</div>\n'
+
+    html += '</body></html>'
 
-    html += '</div>\n'
+    with open(OUTPUT_HTML, "w", encoding="utf-8") as f:
+        f.write(html)
 
-html += '</body></html>'
+    print(f"Preview generated: {OUTPUT_HTML}")
 
-with open(OUTPUT_HTML, "w", encoding="utf-8") as f:
-    f.write(html)
 
-print(f"Preview generated: {OUTPUT_HTML}")
+if __name__ == "__main__":
+    main()
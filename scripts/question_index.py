@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Flattened, columnar index of every Part B question in the paper bank.
+- one row per question; columns are compact arrays (paper, number,
+  bucket, level, text) with paper ids, levels and texts interned
+- rows are grouped by paper in their original list order, so a paper's
+  questions are one contiguous range; each row keeps its list index (the
+  one the marker question selector stores)
+- a question whose number is not a whole number in 1..255 is skipped
+  with a warning; a missing number falls back to its position
+- precomputed row lists per difficulty bucket (and per paper + bucket)
+- the same structure is written as a static artifact
+  (public/paper-data/questions.json + .gz/.br) for the app
+
+  python3 scripts/question_index.py                      # build artifact + summary
+  python3 scripts/question_index.py --draw high -n 3     # random questions from a bucket
+  python3 scripts/question_index.py --paper 2012-1.1 --bucket medium
+"""
+
+import argparse
+import json
+import os
+import random
+from array import array
+
+from export_snapshot import OUTPUT_DIR, compact, compressors, write_variants
+
+PAPERS_JSON = "data/pastpaper_papers.json"
+ARTIFACT = os.path.join(OUTPUT_DIR, "questions.json")
+INDEX_VERSION = 2
+
+BUCKETS = ["low", "medium", "high"]
+# Spellings seen in the data / UI -> bucket
+BUCKET_ALIASES = {"low": "low", "easy": "low", "medium": "medium", "high": "high", "hard": "high"}
+DEFAULT_BUCKET = "medium"
+
+
+def bucket_of(q):
+    return BUCKET_ALIASES.get(str(q.get("difficulty") or "").lower(), DEFAULT_BUCKET)
+
+
+def question_number(q, pos):
+    """The question's number (its position + 1 if unset), or None if it is not usable."""
+    number = q.get("number")
+    if number is None or number == "":
+        return pos + 1
+    try:
+        number = int(str(number).strip())
+    except ValueError:
+        return None
+    return number if 0 < number < 256 else None
+
+
+class QuestionIndex:
+    """Columnar question table with O(1) lookups by paper, bucket and number."""
+
+    def __init__(self):
+        self.papers = []  # paper_id per paper slot
+        self.paper_uuids = []  # db id per paper slot
+        self.levels = []  # interned difficulty_level strings
+        self.texts = []  # interned question texts
+        self.paper = array("H")  # row -> paper slot
+        self.index = array("B")  # row -> position in the paper's part_b_questions
+        self.number = array("B")  # row -> question number
+        self.bucket = array("B")  # row -> index into BUCKETS
+        self.level = array("B")  # row -> index into levels
+        self.text = array("I")  # row -> index into texts
+        self.by_bucket = {b: array("I") for b in BUCKETS}
+        self.by_paper = {}  # paper_id -> (start, end) row range
+        self.by_paper_bucket = {}  # (paper_id, bucket) -> array of rows
+
+    @classmethod
+    def build(cls, papers):
+        idx = cls()
+        level_ids, text_ids = {}, {}
+
+        def intern(table, ids, s):
+            if s not in ids:
+                ids[s] = len(table)
+                table.append(s)
+            return ids[s]
+
+        for p in sorted(papers, key=lambda p: p["paper_id"]):
+            slot = len(idx.papers)
+            idx.papers.append(p["paper_id"])
+            idx.paper_uuids.append(p.get("id"))
+            start = len(idx.paper)
+            for pos, q in enumerate(p.get("part_b_questions") or []):
+                number = question_number(q, pos)
+                if number is None:
+                    print(f"  WARNING: {p['paper_id']} question {pos + 1}: "
+                          f"bad number {q.get('number')!r}, skipped")
+                    continue
+                row = len(idx.paper)
+                b = bucket_of(q)
+                idx.paper.append(slot)
+                idx.index.append(pos)
+                idx.number.append(number)
+                idx.bucket.append(BUCKETS.index(b))
+                idx.level.append(intern(idx.levels, level_ids, str(q.get("difficulty_level") or "")))
+                idx.text.append(intern(idx.texts, text_ids, str(q.get("text") or q.get("question") or "")))
+                idx.by_bucket[b].append(row)
+                idx.by_paper_bucket.setdefault((p["paper_id"], b), array("I")).append(row)
+            idx.by_paper[p["paper_id"]] = (start, len(idx.paper))
+        return idx
+
+    def __len__(self):
+        return len(self.paper)
+
+    def row(self, r):
+        return {
+            "paper_id": self.papers[self.paper[r]],
+            "index": self.index[r],
+            "number": self.number[r],
+            "difficulty": BUCKETS[self.bucket[r]],
+            "difficulty_level": self.levels[self.level[r]],
+            "text": self.texts[self.text[r]],
+        }
+
+    def for_paper(self, paper_id, bucket=None):
+        if bucket is not None:
+            return [self.row(r) for r in self.by_paper_bucket.get((paper_id, bucket), ())]
+        start, end = self.by_paper.get(paper_id, (0, 0))
+        return [self.row(r) for r in range(start, end)]
+
+    def get(self, paper_id, number):
+        start, end = self.by_paper.get(paper_id, (0, 0))
+        for r in range(start, end):
+            if self.number[r] == number:
+                return self.row(r)
+        return None
+
+    def draw(self, bucket, n=1, rng=random, exclude_papers=()):
+        """n distinct random questions from a bucket, optionally skipping papers."""
+        rows = self.by_bucket[bucket]
+        if not exclude_papers:
+            return [self.row(rows[i]) for i in rng.sample(range(len(rows)), min(n, len(rows)))]
+        skip = set(exclude_papers)
+        picked, seen = [], set()
+        while len(picked) < n and len(seen) < len(rows):
+            i = rng.randrange(len(rows))
+            if i in seen:
+                continue
+            seen.add(i)
+            r = rows[i]
+            if self.papers[self.paper[r]] not in skip:
+                picked.append(self.row(r))
+        return picked
+
+    def to_json(self):
+        return {
+            "version": INDEX_VERSION,
+            "buckets": BUCKETS,
+            "papers": self.papers,
+            "paper_uuids": self.paper_uuids,
+            "levels": self.levels,
+            "texts": self.texts,
+            "columns": {
+                "paper": self.paper.tolist(),
+                "index": self.index.tolist(),
+                "number": self.number.tolist(),
+                "bucket": self.bucket.tolist(),
+                "level": self.level.tolist(),
+                "text": self.text.tolist(),
+            },
+            "by_bucket": {b: rows.tolist() for b, rows in self.by_bucket.items()},
+            "by_paper": {pid: list(rng) for pid, rng in self.by_paper.items()},
+        }
+
+    @classmethod
+    def from_json(cls, data):
+        idx = cls()
+        idx.papers, idx.paper_uuids = data["papers"], data["paper_uuids"]
+        idx.levels, idx.texts = data["levels"], data["texts"]
+        cols = data["columns"]
+        idx.paper, idx.index = array("H", cols["paper"]), array("B", cols["index"])
+        idx.number = array("B", cols["number"])
+        idx.bucket, idx.level = array("B", cols["bucket"]), array("B", cols["level"])
+        idx.text = array("I", cols["text"])
+        idx.by_bucket = {b: array("I", rows) for b, rows in data["by_bucket"].items()}
+        idx.by_paper = {pid: tuple(rng) for pid, rng in data["by_paper"].items()}
+        for r in range(len(idx.paper)):
+            key = (idx.papers[idx.paper[r]], BUCKETS[idx.bucket[r]])
+            idx.by_paper_bucket.setdefault(key, array("I")).append(r)
+        return idx
+
+
+def load(path=ARTIFACT):
+    """Load the built artifact, or build from the paper JSON when it is missing or outdated."""
+    if os.path.exists(path):
+        with open(path) as f:
+            data = json.load(f)
+        if data.get("version") == INDEX_VERSION:  # older artifacts lack columns
+            return QuestionIndex.from_json(data)
+    with open(PAPERS_JSON) as f:
+        return QuestionIndex.build(json.load(f))
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Flattened Part B question index")
+    ap.add_argument("--draw", choices=BUCKETS, help="draw random questions from a bucket")
+    ap.add_argument("-n", type=int, default=1, help="questions to draw")
+    ap.add_argument("--paper", help="list a paper's questions")
+    ap.add_argument("--bucket", choices=BUCKETS, help="with --paper: only this bucket")
+    args = ap.parse_args()
+
+    if args.draw or args.paper:
+        idx = load()
+        rows = idx.draw(args.draw, args.n) if args.draw else idx.for_paper(args.paper, args.bucket)
+        for q in rows:
+            print(f"  {q['paper_id']:<18} #{q['number']:<2} {q['difficulty']:<6} {q['text']}")
+        return
+
+    with open(PAPERS_JSON) as f:
+        idx = QuestionIndex.build(json.load(f))
+    data = compact(idx.to_json())
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    current = None
+    if os.path.exists(ARTIFACT):
+        with open(ARTIFACT, "rb") as f:
+            current = f.read()
+    if current != data:
+        sizes = write_variants(ARTIFACT, data, compressors())
+        print("  wrote " + "  ".join(f"{s} {n / 1024:.0f} KB" for s, n in sizes.items()))
+
+    print(f"{len(idx)} questions in {len(idx.papers)} papers, {len(idx.texts)} distinct texts")
+    for b in BUCKETS:
+        print(f"  {b:<6} {len(idx.by_bucket[b])}")
+    print(f"Artifact: {ARTIFACT}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+On-disk cache of rasterized PDF pages for pdf_to_images.py.
+Entries are keyed by a fingerprint of the page (content streams,
+resources, geometry) plus the zoom, and hold the lossless pixel
+samples (zlib level 1), so re-encoding at another quality or format
+skips get_pixmap entirely. Size-bounded, least-recently-used eviction
+based on file mtime (touched on every hit); the bound is enforced as
+entries are written, so long-running watchers and 400 DPI tile renders
+stay within it.
+
+  python3 scripts/raster_cache.py            # show cache size
+  python3 scripts/raster_cache.py --clear
+"""
+
+import argparse
+import hashlib
+import os
+import struct
+import zlib
+
+CACHE_DIR = "data/.raster_cache"
+CACHE_MAX_BYTES = 2 * 1024 ** 3  # 2 GB
+EVICT_TO = 0.9  # when put() crosses the limit, evict down to this fraction of it
+
+HEADER = struct.Struct(">4sIIB")  # magic, width, height, channels
+MAGIC = b"RPX1"
+MODES = {1: "L", 3: "RGB", 4: "RGBA"}
+
+
+def page_fingerprint(page):
+    """Hash everything that affects how a page renders."""
+    doc = page.parent
+    h = hashlib.sha256()
+    h.update(page.read_contents())
+    h.update(doc.xref_object(page.xref, compressed=True).encode("utf-8"))
+    # Resources are usually indirect: include the objects they point at
+    for xref in [img[0] for img in page.get_images(full=True)] + [x[0] for x in page.get_xobjects()]:
+        if xref > 0:
+            h.update(doc.xref_object(xref, compressed=True).encode("utf-8"))
+            h.update(doc.xref_stream_raw(xref) or b"")
+    for font in page.get_fonts(full=True):
+        if font[0] > 0:
+            h.update(doc.xref_object(font[0], compressed=True).encode("utf-8"))
+    h.update(repr((tuple(page.rect), page.rotation)).encode("utf-8"))
+    return h.hexdigest()
+
+
+class RasterCache:
+    def __init__(self, root=CACHE_DIR, max_bytes=CACHE_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0  # bytes
+        self.size = None  # running total, scanned on the first put()
+        os.makedirs(root, exist_ok=True)
+
+    def key(self, page, zoom):
+        return f"{page_fingerprint(page)}-{zoom:.4f}"
+
+    def _path(self, key):
+        return os.path.join(self.root, key[:2], key + ".px")
+
+    def get(self, key):
+        """Return (mode, width, height, samples) or None."""
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                raw = f.read()
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        magic, width, height, n = HEADER.unpack_from(raw)
+        if magic != MAGIC or n not in MODES:
+            self.misses += 1
+            return None
+        os.utime(path)  # mark as recently used
+        self.hits += 1
+        return MODES[n], width, height, zlib.decompress(raw[HEADER.size:])
+
+    def put(self, key, width, height, channels, samples):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(HEADER.pack(MAGIC, width, height, channels))
+            f.write(zlib.compress(samples, 1))
+        os.replace(tmp, path)
+        if self.size is None:
+            self.size = sum(size for _, size, _ in self.entries())
+        else:
+            self.size += os.path.getsize(path)
+        if self.size > self.max_bytes:
+            self.evict(int(self.max_bytes * EVICT_TO))
+
+    def entries(self):
+        out = []
+        for sub in os.scandir(self.root):
+            if not sub.is_dir():
+                continue
+            for e in os.scandir(sub.path):
+                if e.name.endswith(".px"):
+                    st = e.stat()
+                    out.append((st.st_mtime, st.st_size, e.path))
+        return out
+
+    def evict(self, target=None):
+        """Drop least recently used entries until under target (default max_bytes). Returns bytes freed."""
+        target = self.max_bytes if target is None else target
+        entries = sorted(self.entries())
+        total = sum(size for _, size, _ in entries)
+        freed = 0
+        for _, size, path in entries:
+            if total <= target:
+                break
+            os.remove(path)
+            total -= size
+            freed += size
+        self.size = total
+        self.evicted += freed
+        return freed
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Inspect or clear the raster cache")
+    ap.add_argument("--clear", action="store_true")
+    args = ap.parse_args()
+
+    cache = RasterCache()
+    if args.clear:
+        cache.max_bytes = 0
+        freed = cache.evict()
+        print(f"Cleared {freed / 1024 / 1024:.1f} MB from {CACHE_DIR}")
+        return
+    entries = cache.entries()
+    total = sum(size for _, size, _ in entries)
+    print(f"{CACHE_DIR}: {len(entries)} pages, {total / 1024 / 1024:.1f} MB "
+          f"(limit {CACHE_MAX_BYTES / 1024 / 1024:.0f} MB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+Run generated SQL files (data/stmt_*.sql, data/sql_batch_*.sql,
+data/exec_batch_*.sql, data/mcp_stmts/*.sql, or a generator's stdout)
+against a Postgres DSN.
+- statements are split with a quote/comment-aware scanner; BEGIN/COMMIT
+  in the files are ignored, transactions are per chunk instead
+- each chunk is sent as one pipeline (no round trip per statement)
+- if a chunk fails it is replayed statement by statement under
+  savepoints, so every failing statement is captured with its SQLSTATE
+  and the rest of the chunk still commits (--stop-on-error to abort)
+- progress is checkpointed per file after every committed chunk; a rerun
+  resumes from the next chunk (a changed file starts over)
+- several files run in parallel over a connection pool (--workers)
+
+  python3 scripts/run_sql.py --dsn postgresql://localhost/dse data/sql_batch_*.sql
+  python3 scripts/update_page_images_sql.py | python3 scripts/run_sql.py -
+  python3 scripts/run_sql.py --dry-run data/mcp_stmts/*.sql
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import config
+
+STATE_FILE = "data/.run_sql_state.json"  # file -> {sha256, statements committed}
+ERRORS_FILE = "data/run_sql_errors.json"
+CHUNK_SIZE = 50  # statements per transaction
+TRANSACTION_CONTROL = {"BEGIN", "COMMIT", "END", "ROLLBACK", "START TRANSACTION", "BEGIN TRANSACTION"}
+
+
+def split_statements(sql):
+    """Split SQL text on top-level semicolons (quotes, E'' strings, $$ and comments aware)."""
+    stmts, start, i, n = [], 0, 0, len(sql)
+    while i < n:
+        c = sql[i]
+        if c == "-" and sql.startswith("--", i):
+            j = sql.find("\n", i)
+            i = n if j < 0 else j + 1
+        elif c == "/" and sql.startswith("/*", i):
+            j = sql.find("*/", i + 2)
+            i = n if j < 0 else j + 2
+        elif c == "'":
+            # E'...' allows backslash escapes; both forms escape ' as ''
+            escapes = i > 0 and sql[i - 1] in "eE" and (i == 1 or not (sql[i - 2].isalnum() or sql[i - 2] == "_"))
+            i += 1
+            while i < n:
+                if escapes and sql[i] == "\\":
+                    i += 2
+                elif sql[i] == "'":
+                    if sql.startswith("''", i):
+                        i += 2
+                    else:
+                        i += 1
+                        break
+                else:
+                    i += 1
+        elif c == '"':
+            j = sql.find('"', i + 1)
+            i = n if j < 0 else j + 1
+        elif c == "$":
+            j = sql.find("$", i + 1)
+            tag = sql[i:j + 1] if j > 0 else ""
+            if tag and (len(tag) == 2 or tag[1:-1].replace("_", "").isalnum()) and not tag[1].isdigit():
+                k = sql.find(tag, j + 1)
+                i = n if k < 0 else k + len(tag)
+            else:
+                i += 1
+        elif c == ";":
+            stmts.append(sql[start:i])
+            i += 1
+            start = i
+        else:
+            i += 1
+    stmts.append(sql[start:])
+    return [s.strip() for s in stmts if s.strip() and not is_comment_only(s)]
+
+
+def is_comment_only(stmt):
+    return all(not line.strip() or line.strip().startswith("--") for line in stmt.splitlines())
+
+
+def executable(stmts):
+    return [s for s in stmts if " ".join(s.upper().split()) not in TRANSACTION_CONTROL]
+
+
+def load_inputs(paths):
+    """[(name, sha256, statements)] for files or '-' (stdin)."""
+    inputs = []
+    for path in paths:
+        if path == "-":
+            text = sys.stdin.read()
+            name = "<stdin>"
+        else:
+            with open(path, encoding="utf-8") as f:
+                text = f.read()
+            name = os.path.normpath(path)
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        inputs.append((name, digest, executable(split_statements(text))))
+    return inputs
+
+
+def connect_pool(dsn, size):
+    """A psycopg_pool.ConnectionPool if installed, else a minimal stand-in with the same connection()."""
+    try:
+        import psycopg
+    except ImportError:
+        raise SystemExit("ERROR: psycopg not installed. Run: pip3 install 'psycopg[binary]'")
+    try:
+        from psycopg_pool import ConnectionPool
+    except ImportError:
+        ConnectionPool = None
+    if ConnectionPool:
+        return ConnectionPool(dsn, min_size=1, max_size=size, open=True)
+
+    import contextlib
+    import queue
+
+    class SimplePool:
+        def __init__(self):
+            self.idle = queue.LifoQueue()
+
+        @contextlib.contextmanager
+        def connection(self):
+            try:
+                conn = self.idle.get_nowait()
+            except queue.Empty:
+                conn = psycopg.connect(dsn)
+            try:
+                yield conn
+            finally:
+                self.idle.put(conn)
+
+        def close(self):
+            while not self.idle.empty():
+                self.idle.get_nowait().close()
+
+    return SimplePool()
+
+
+def run_chunk(conn, stmts, stop_on_error):
+    """Commit one chunk. Returns a list of (index in chunk, sqlstate, message)."""
+    import psycopg
+
+    try:
+        with conn.transaction():
+            with conn.pipeline():
+                for s in stmts:
+                    conn.execute(s)
+        return []
+    except psycopg.Error:
+        pass  # replay below to find out which statements fail
+
+    errors = []
+    with conn.transaction():
+        for i, s in enumerate(stmts):
+            try:
+                with conn.transaction():  # savepoint
+                    conn.execute(s)
+            except psycopg.Error as e:
+                errors.append((i, e.sqlstate, str(e).strip().splitlines()[0]))
+                if stop_on_error:
+                    raise
+    return errors
+
+
+class Checkpoint:
+    def __init__(self, path=STATE_FILE):
+        self.path = path
+        self.state = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                self.state = json.load(f)
+        self.lock = threading.Lock()
+
+    def resume_from(self, name, digest):
+        entry = self.state.get(name)
+        return entry["committed"] if entry and entry["sha256"] == digest else 0
+
+    def commit(self, name, digest, committed):
+        with self.lock:
+            self.state[name] = {"sha256": digest, "committed": committed}
+            tmp = self.path + ".tmp"
+            with open(tmp, "w") as f:
+                json.dump(self.state, f, indent=1)
+            os.replace(tmp, self.path)
+
+
+def run_file(pool, checkpoint, name, digest, stmts, chunk_size, stop_on_error):
+    first = checkpoint.resume_from(name, digest)
+    errors, executed = [], 0
+    t0 = time.perf_counter()
+    with pool.connection() as conn:
+        conn.autocommit = True  # transactions are explicit, per chunk
+        for start in range(first, len(stmts), chunk_size):
+            chunk = stmts[start:start + chunk_size]
+            try:
+                failed = run_chunk(conn, chunk, stop_on_error)
+            except Exception as e:
+                errors.append({"file": name, "statement": start, "sqlstate": getattr(e, "sqlstate", None),
+                               "error": str(e).strip()[:300]})
+                return name, executed, errors, f"stopped at statement {start}", time.perf_counter() - t0
+            for i, state, msg in failed:
+                errors.append({"file": name, "statement": start + i, "sqlstate": state,
+                               "error": msg, "sql": chunk[i][:200]})
+            executed += len(chunk) - len(failed)
+            checkpoint.commit(name, digest, start + len(chunk))
+    note = f"resumed at statement {first}" if first else ""
+    return name, executed, errors, note, time.perf_counter() - t0
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Execute generated SQL files against Postgres")
+    ap.add_argument("files", nargs="+", help="SQL files, or - for stdin")
+    ap.add_argument("--dsn", default=config.get("DATABASE_URL"), help="Postgres DSN (default: $DATABASE_URL)")
+    ap.add_argument("--chunk", type=int, default=CHUNK_SIZE, help="statements per transaction")
+    ap.add_argument("--workers", type=int, default=1, help="files run in parallel")
+    ap.add_argument("--stop-on-error", action="store_true", help="abort a file at its first failing chunk")
+    ap.add_argument("--restart", action="store_true", help="ignore the checkpoint and run everything")
+    ap.add_argument("--dry-run", action="store_true", help="only parse and count statements")
+    args = ap.parse_args()
+
+    inputs = load_inputs(args.files)
+    total = sum(len(s) for _, _, s in inputs)
+    print(f"{len(inputs)} inputs, {total} statements")
+    checkpoint = Checkpoint()
+    if args.restart:
+        checkpoint.state = {}
+    if args.dry_run:
+        for name, digest, stmts in inputs:
+            done = checkpoint.resume_from(name, digest)
+            print(f"  {name:<40} {len(stmts):>5} statements" + (f", {done} done" if done else ""))
+        return
+    if not args.dsn:
+        print("ERROR: pass --dsn or set DATABASE_URL")
+        return
+
+    pool = connect_pool(args.dsn, max(1, args.workers))
+    all_errors, executed = [], 0
+    t0 = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, args.workers)) as ex:
+            jobs = [ex.submit(run_file, pool, checkpoint, name, digest, stmts, args.chunk, args.stop_on_error)
+                    for name, digest, stmts in inputs]
+            for job in jobs:
+                name, n, errors, note, secs = job.result()
+                executed += n
+                all_errors += errors
+                print(f"  {name:<40} {n:>5} ok  {len(errors):>3} errors  {secs:6.2f}s  {note}")
+    finally:
+        pool.close()
+
+    print(f"\n{executed} statements executed in {time.perf_counter() - t0:.2f}s, {len(all_errors)} errors")
+    if all_errors:
+        with open(ERRORS_FILE, "w", encoding="utf-8") as f:
+            json.dump(all_errors, f, indent=2, ensure_ascii=False)
+        for e in all_errors[:10]:
+            print(f"  {e['file']} #{e['statement']}: [{e['sqlstate']}] {e['error']}")
+        print(f"Errors: {ERRORS_FILE}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Topic similarity index over pastpaper_papers.json.
+- each paper is embedded as hashed word unigrams + bigrams of its topic,
+  title, discussion points and article (weighted in that order), with
+  sublinear term frequency
+- the raw term-frequency rows are stored as a memory-mapped float32
+  matrix; IDF weighting and L2 normalisation are applied at load time,
+  so rebuilding only re-embeds papers whose text changed
+- queries are answered with one batched matrix product; related-paper
+  lists for every paper are exported to data/related_papers.json
+
+  python3 scripts/similar_papers.py --build                 # incremental
+  python3 scripts/similar_papers.py 2012-1.1 2019-3.2 -k 5  # most similar
+  python3 scripts/similar_papers.py --diverse 6 --avoid 2012-1.1,2013-2.4
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import zlib
+
+PAPERS_JSON = "data/pastpaper_papers.json"
+INDEX_DIR = "data/similarity"
+MATRIX_FILE = os.path.join(INDEX_DIR, "tf.npy")  # papers x DIM float32
+META_FILE = os.path.join(INDEX_DIR, "index.json")  # paper ids, text hashes, settings
+RELATED_JSON = "data/related_papers.json"
+
+DIM = 4096  # hashed feature space (267 papers -> ~4 MB)
+RELATED_K = 10
+FIELD_WEIGHTS = {
+    "topic": 3.0,
+    "part_a_title": 2.0,
+    "part_a_discussion_points": 2.0,
+    "part_a_article": 1.0,
+}
+SETTINGS = {"dim": DIM, "weights": FIELD_WEIGHTS, "version": 1}
+
+TOKEN_RE = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+STOPWORDS = set(
+    "a an and are as at be been but by can could do does for from had has have how if in into is it its "
+    "may might more most not of on or our should so some than that the their them there these they this "
+    "to was we were what when which who why will with would you your".split()
+)
+
+
+def paper_text(p, field):
+    v = p.get(field) or ""
+    return " ".join(v) if isinstance(v, list) else str(v)
+
+
+def text_hash(p):
+    raw = json.dumps([paper_text(p, f) for f in FIELD_WEIGHTS], ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def features(text):
+    """Unigrams and bigrams (stopwords dropped, bigrams skip over them)."""
+    words = [w for w in TOKEN_RE.findall(text.lower().replace("**", " ")) if w not in STOPWORDS]
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+def embed(p):
+    """Sublinear, field-weighted hashed term frequencies for one paper."""
+    import numpy as np
+
+    row = np.zeros(DIM, dtype=np.float32)
+    for field, weight in FIELD_WEIGHTS.items():
+        counts = {}
+        for tok in features(paper_text(p, field)):
+            h = zlib.crc32(tok.encode("utf-8")) % DIM
+            counts[h] = counts.get(h, 0) + 1
+        if counts:
+            idx = np.fromiter(counts.keys(), dtype=np.int64)
+            tf = np.fromiter(counts.values(), dtype=np.float32)
+            row[idx] += weight * (1 + np.log(tf))
+    return row
+
+
+def build(papers, rebuild=False):
+    """Write the tf matrix, re-embedding only new or changed papers. Returns (embedded, reused)."""
+    import numpy as np
+
+    old_meta, old_tf = None, None
+    if not rebuild and os.path.exists(META_FILE) and os.path.exists(MATRIX_FILE):
+        with open(META_FILE) as f:
+            old_meta = json.load(f)
+        if old_meta.get("settings") == SETTINGS:
+            old_tf = np.load(MATRIX_FILE, mmap_mode="r")
+        else:
+            old_meta = None
+    old_rows = {}
+    if old_meta:
+        old_rows = {(pid, h): i for i, (pid, h) in enumerate(zip(old_meta["paper_ids"], old_meta["hashes"]))}
+
+    os.makedirs(INDEX_DIR, exist_ok=True)
+    tmp = MATRIX_FILE + ".tmp.npy"
+    tf = np.lib.format.open_memmap(tmp, mode="w+", dtype=np.float32, shape=(len(papers), DIM))
+    ids, hashes, embedded = [], [], 0
+    for i, p in enumerate(papers):
+        h = text_hash(p)
+        j = old_rows.get((p["paper_id"], h))
+        if j is not None:
+            tf[i] = old_tf[j]
+        else:
+            tf[i] = embed(p)
+            embedded += 1
+        ids.append(p["paper_id"])
+        hashes.append(h)
+    tf.flush()
+    del tf, old_tf
+    os.replace(tmp, MATRIX_FILE)
+
+    with open(META_FILE, "w") as f:
+        json.dump({"settings": SETTINGS, "paper_ids": ids, "hashes": hashes}, f)
+    return embedded, len(papers) - embedded
+
+
+class SimilarityIndex:
+    """TF-IDF weighted, L2-normalised view over the stored tf matrix."""
+
+    def __init__(self, meta_file=META_FILE, matrix_file=MATRIX_FILE):
+        import numpy as np
+
+        with open(meta_file) as f:
+            meta = json.load(f)
+        self.paper_ids = meta["paper_ids"]
+        self.row = {pid: i for i, pid in enumerate(self.paper_ids)}
+        tf = np.load(matrix_file, mmap_mode="r")
+        df = np.count_nonzero(tf, axis=0)
+        idf = np.log((1 + len(tf)) / (1 + df)).astype(np.float32) + 1
+        m = tf * idf
+        norms = np.linalg.norm(m, axis=1, keepdims=True)
+        self.matrix = m / np.maximum(norms, 1e-12)
+
+    def scores(self, paper_ids):
+        """Cosine similarity of each given paper against all papers (len(ids) x N)."""
+        rows = [self.row[pid] for pid in paper_ids]
+        return self.matrix[rows] @ self.matrix.T
+
+    def most_similar(self, paper_ids, k=5, exclude=()):
+        """Top-k [(paper_id, score)] per query paper, in one matrix product."""
+        import numpy as np
+
+        if not paper_ids:
+            return {}
+        sims = self.scores(paper_ids)
+        skip = [self.row[pid] for pid in exclude if pid in self.row]
+        sims[:, skip] = -np.inf
+        for qi, pid in enumerate(paper_ids):
+            sims[qi, self.row[pid]] = -np.inf
+        k = min(k, len(self.paper_ids) - 1)
+        top = np.argpartition(-sims, k - 1, axis=1)[:, :k] if k > 0 else np.empty((len(paper_ids), 0), int)
+        out = {}
+        for qi, pid in enumerate(paper_ids):
+            order = top[qi][np.argsort(-sims[qi, top[qi]])]
+            out[pid] = [(self.paper_ids[j], round(float(sims[qi, j]), 4))
+                        for j in order if np.isfinite(sims[qi, j])]
+        return out
+
+    def diverse(self, n, avoid=(), candidates=None):
+        """Greedily pick n papers, each as unlike the avoided/already picked ones as possible."""
+        import numpy as np
+
+        pool = [self.row[pid] for pid in (candidates or self.paper_ids) if pid in self.row]
+        avoid_rows = [self.row[pid] for pid in avoid if pid in self.row]
+        skip = set(avoid_rows)
+        pool = [i for i in pool if i not in skip]
+        if not pool:
+            return []
+        sub = self.matrix[pool]
+        # Highest similarity of each candidate to anything chosen or avoided so far
+        closest = (sub @ self.matrix[avoid_rows].T).max(axis=1) if avoid_rows else np.full(len(pool), -1.0)
+        picked = []
+        for _ in range(min(n, len(pool))):
+            i = int(np.argmin(closest))
+            picked.append((self.paper_ids[pool[i]], round(float(closest[i]), 4)))
+            closest = np.maximum(closest, sub @ sub[i])
+            closest[i] = np.inf
+        return picked
+
+
+def export_related(index, k=RELATED_K):
+    related = index.most_similar(index.paper_ids, k)
+    with open(RELATED_JSON, "w", encoding="utf-8") as f:
+        json.dump({pid: [{"paper_id": o, "score": s} for o, s in lst] for pid, lst in related.items()},
+                  f, indent=1, ensure_ascii=False)
+    return related
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Related / dissimilar papers by topic")
+    ap.add_argument("paper_ids", nargs="*", help="papers to find neighbours for")
+    ap.add_argument("-k", type=int, default=5, help="neighbours per paper")
+    ap.add_argument("--build", action="store_true", help="update the index (changed papers only)")
+    ap.add_argument("--rebuild", action="store_true", help="re-embed every paper")
+    ap.add_argument("--diverse", type=int, metavar="N", help="pick N mutually dissimilar papers")
+    ap.add_argument("--avoid", default="", help="comma-separated paper_ids to stay away from")
+    args = ap.parse_args()
+
+    if args.build or args.rebuild or not os.path.exists(META_FILE):
+        with open(PAPERS_JSON) as f:
+            papers = json.load(f)
+        embedded, reused = build(papers, rebuild=args.rebuild)
+        print(f"Index: {len(papers)} papers ({embedded} embedded, {reused} unchanged) -> {MATRIX_FILE}")
+        index = SimilarityIndex()
+        export_related(index)
+        print(f"Related papers: {RELATED_JSON} (top {RELATED_K} each)")
+    else:
+        index = SimilarityIndex()
+
+    unknown = [pid for pid in args.paper_ids if pid not in index.row]
+    if unknown:
+        print(f"Unknown paper_ids (rebuild with --build?): {unknown}")
+    query = [pid for pid in args.paper_ids if pid in index.row]
+    avoid = [pid.strip() for pid in args.avoid.split(",") if pid.strip()]
+
+    for pid, hits in index.most_similar(query, args.k, exclude=avoid).items():
+        print(f"\n{pid}")
+        for other, score in hits:
+            print(f"  {score:.3f}  {other}")
+
+    if args.diverse:
+        print(f"\n{args.diverse} dissimilar papers" + (f" (avoiding {', '.join(avoid)})" if avoid else ""))
+        for pid, score in index.diverse(args.diverse, avoid=avoid + query):
+            print(f"  {score:.3f}  {pid}")
+
+
+if __name__ == "__main__":
+    main()
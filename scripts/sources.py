@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Registry of exam sources: the one place that knows which PDF produces
+which image folder, which paper_id prefix and DB year it belongs to,
+which pages are kept and how images are matched to papers.
+Everything else (PDF_RULES, FOLDERS, paper_id -> folder) is derived
+from SOURCES at import time. paper_id -> folder goes through a prefix
+trie compiled once, so resolving is linear in the id's length and
+filtering a mapping is one pass.
+
+  python3 scripts/sources.py              # print the table
+  python3 scripts/sources.py 2012practice-1.2 2019-3.1
+"""
+
+import argparse
+
+# folder:  image folder under data/images (also the storage path prefix)
+# prefix:  paper_id prefix ("<prefix>-<paper_number>")
+# pdf:     source PDF under PDF_DIR (None = images only)
+# pages:   "odd" = odd PDF pages only, "all" = every page
+# mode:    "sequence" = images follow 1.1, 1.2, 1.3, 2.1, ... (gaps allowed in DB)
+#          "ordered"  = images map 1:1 to the folder's DB papers in sorted order
+SOURCES = [
+    {"folder": "2012",          "prefix": "2012",         "year": 2012, "pdf": "2012.pdf",                "pages": "odd", "mode": "sequence"},
+    {"folder": "2012-practice", "prefix": "2012practice", "year": 2012, "pdf": "2012 Practice Paper.pdf", "pages": "odd", "mode": "ordered"},
+    {"folder": "2012-sample",   "prefix": "2012sample",   "year": 2012, "pdf": "2012 Sample Paper.pdf",   "pages": "all", "mode": "ordered"},
+    {"folder": "2013",          "prefix": "2013",         "year": 2013, "pdf": "2013.pdf",                "pages": "odd", "mode": "sequence"},
+    {"folder": "2014",          "prefix": "2014",         "year": 2014, "pdf": "2014.pdf",                "pages": "all", "mode": "sequence"},
+    {"folder": "2015",          "prefix": "2015",         "year": 2015, "pdf": "2015.pdf",                "pages": "odd", "mode": "sequence"},
+    {"folder": "2016",          "prefix": "2016",         "year": 2016, "pdf": "2016.pdf",                "pages": "all", "mode": "sequence"},
+    {"folder": "2017",          "prefix": "2017",         "year": 2017, "pdf": "2017.pdf",                "pages": "all", "mode": "sequence"},
+    {"folder": "2018",          "prefix": "2018",         "year": 2018, "pdf": "2018.pdf",                "pages": "all", "mode": "sequence"},
+    {"folder": "2019",          "prefix": "2019",         "year": 2019, "pdf": "2019.pdf",                "pages": "all", "mode": "sequence"},
+    {"folder": "2023",          "prefix": "2023",         "year": 2023, "pdf": "2023.pdf",                "pages": "odd", "mode": "sequence"},
+    {"folder": "2024",          "prefix": "2024",         "year": 2024, "pdf": "2024.pdf",                "pages": "odd", "mode": "ordered"},
+    {"folder": "2025",          "prefix": "2025",         "year": 2025, "pdf": "2025 P4.pdf",             "pages": "odd", "mode": "sequence"},
+]
+
+# Derived views
+FOLDERS = {s["folder"]: {"prefix": s["prefix"], "year": s["year"], "mode": s["mode"]} for s in SOURCES}
+PREFIX_TO_FOLDER = {s["prefix"]: s["folder"] for s in SOURCES}
+PDF_RULES = {s["pdf"]: {"key": s["folder"], "pages": s["pages"]} for s in SOURCES if s.get("pdf")}
+
+_END = ""  # trie key holding the folder for a complete prefix
+
+
+def compile_trie(prefix_to_folder):
+    trie = {}
+    for prefix, folder in prefix_to_folder.items():
+        node = trie
+        for ch in prefix:
+            node = node.setdefault(ch, {})
+        node[_END] = folder
+    return trie
+
+
+_TRIE = compile_trie(PREFIX_TO_FOLDER)
+
+
+def folder_for(paper_id, trie=_TRIE):
+    """Folder of the longest prefix p with paper_id == p or paper_id.startswith(p + "-")."""
+    node, found = trie, None
+    for i, ch in enumerate(paper_id):
+        if _END in node and ch == "-":
+            found = node[_END]
+        node = node.get(ch)
+        if node is None:
+            return found
+    return node.get(_END, found)
+
+
+# Older name used by the upload / SQL scripts
+expected_folder = folder_for
+
+
+def in_expected_folder(paper_id, image):
+    """False when a mapping entry points at another source's folder (a wrong mapping)."""
+    folder = folder_for(paper_id)
+    return folder is None or image.startswith(folder + "/")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Print the source registry or resolve paper_ids to folders")
+    ap.add_argument("paper_ids", nargs="*", help="paper_ids to resolve (default: print the table)")
+    args = ap.parse_args()
+    if args.paper_ids:
+        for pid in args.paper_ids:
+            print(f"  {pid:<24} -> {folder_for(pid)}")
+        return
+    for s in SOURCES:
+        print(f"  {s['folder']:<14} {s['prefix']:<13} {s['year']}  {s['mode']:<8} "
+              f"{s['pages']:<4} {s.get('pdf') or '-'}")
+
+
+if __name__ == "__main__":
+    main()
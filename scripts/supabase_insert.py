@@ -6,8 +6,8 @@ one per paper, for easy execution via Supabase MCP.
 
 import json
 
-PAPERS_JSON = "/Users/randy/dsespeakingweb/data/pastpaper_papers.json"
-ADDPP_FILE = "/Users/randy/dsespeakingweb/addpp.md"
+PAPERS_JSON = "data/pastpaper_papers.json"
+ADDPP_FILE = "addpp.md"
 
 with open(ADDPP_FILE) as f:
     new_papers = json.load(f)
@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+Diff-based sync of local pastpaper_papers.json against the live table.
+- compares per-row content hashes + updated_at against a small snapshot
+  (id, paper_id, updated_at) instead of pulling the whole table
+- only rows with no recorded sync state are fetched in full; if such a
+  row differs, it is reported as a conflict rather than overwritten
+- emits the minimal INSERT / UPDATE / DELETE set, batched per transaction
+- targets a local Postgres DSN or a JSON stand-in file (for tests)
+
+Usage:
+  python3 scripts/sync_papers.py --json data/remote_snapshot.json       # dry run, writes SQL
+  python3 scripts/sync_papers.py --dsn postgresql://localhost/dse --apply
+"""
+
+import argparse
+import hashlib
+import json
+import os
+from datetime import datetime, timezone
+
+from paper_sql import CONTENT_COLUMNS, ALL_COLUMNS, insert_sql, update_sql, delete_sql
+
+PAPERS_JSON = "data/pastpaper_papers.json"
+STATE_FILE = "data/.sync_state.json"  # paper_id -> {hash, updated_at} at last sync
+SQL_OUTPUT = "data/sync_papers.sql"
+BATCH_SIZE = 20  # statements per transaction
+
+
+def row_hash(p):
+    """Stable hash of the content columns of a paper row."""
+    payload = {c: p.get(c) for c in CONTENT_COLUMNS}
+    raw = json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def chunked(items, size):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+class JsonTable:
+    """JSON file standing in for the pastpaper_papers table."""
+
+    def __init__(self, path):
+        self.path = path
+        self.rows = []
+        if os.path.exists(path):
+            with open(path) as f:
+                self.rows = json.load(f)
+
+    def snapshot(self):
+        return {
+            r["paper_id"]: {"id": r["id"], "updated_at": r.get("updated_at")}
+            for r in self.rows
+        }
+
+    def fetch(self, paper_ids):
+        wanted = set(paper_ids)
+        return {r["paper_id"]: r for r in self.rows if r["paper_id"] in wanted}
+
+    def apply(self, ops):
+        by_id = {r["id"]: r for r in self.rows}
+        for op, p, cols in ops:
+            if op == "insert":
+                by_id[p["id"]] = {c: p.get(c) for c in ALL_COLUMNS}
+            elif op == "update":
+                row = by_id[p["id"]]
+                for c in list(cols) + ["updated_at"]:  # like update_sql on the Postgres path
+                    row[c] = p.get(c)
+            elif op == "delete":
+                by_id.pop(p["id"], None)
+        self.rows = list(by_id.values())
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(self.rows, f, indent=2, ensure_ascii=False)
+        return len(ops)
+
+
+class PostgresTable:
+    """Live pastpaper_papers table over a Postgres DSN (needs psycopg)."""
+
+    def __init__(self, dsn):
+        try:
+            import psycopg
+        except ImportError:
+            raise SystemExit("ERROR: psycopg not installed. Run: pip3 install 'psycopg[binary]'")
+        self.conn = psycopg.connect(dsn)
+
+    def snapshot(self):
+        with self.conn.cursor() as cur:
+            cur.execute("SELECT paper_id, id, updated_at FROM pastpaper_papers")
+            return {
+                pid: {"id": str(rid), "updated_at": ts.isoformat() if ts else None}
+                for pid, rid, ts in cur.fetchall()
+            }
+
+    def fetch(self, paper_ids):
+        if not paper_ids:
+            return {}
+        cols = ", ".join(ALL_COLUMNS)
+        with self.conn.cursor() as cur:
+            cur.execute(
+                f"SELECT {cols} FROM pastpaper_papers WHERE paper_id = ANY(%s)",
+                (list(paper_ids),),
+            )
+            rows = {}
+            for values in cur.fetchall():
+                r = dict(zip(ALL_COLUMNS, values))
+                r["id"] = str(r["id"])
+                for ts in ("created_at", "updated_at"):
+                    if r[ts] is not None:
+                        r[ts] = r[ts].isoformat()
+                rows[r["paper_id"]] = r
+            return rows
+
+    def apply(self, ops):
+        applied = 0
+        for batch in chunked(build_statements(ops), BATCH_SIZE):
+            with self.conn.transaction():
+                with self.conn.cursor() as cur:
+                    for stmt in batch:
+                        cur.execute(stmt)
+            applied += len(batch)
+        return applied
+
+
+def diff(local, remote, state, backend, force=False, delete=False):
+    """
+    Work out the minimal set of operations.
+    Returns (ops, conflicts, remote_only) where ops is a list of
+    (op, paper, changed_columns).
+    """
+    ops, conflicts, unknown = [], [], []
+
+    for pid, p in local.items():
+        r = remote.get(pid)
+        if r is None:
+            ops.append(("insert", p, ALL_COLUMNS))
+            continue
+        st = state.get(pid)
+        if st and st["updated_at"] == r["updated_at"]:
+            # Remote untouched since our last sync: only local edits matter
+            if st["hash"] != row_hash(p):
+                ops.append(("update", p, CONTENT_COLUMNS))
+        else:
+            unknown.append(pid)
+
+    # Rows we have no trustworthy state for: compare full content
+    fetched = backend.fetch(unknown)
+    for pid in unknown:
+        p, r = local[pid], fetched[pid]
+        changed = [c for c in CONTENT_COLUMNS if p.get(c) != r.get(c)]
+        if not changed:
+            continue
+        # No state means we never saw this row match: a difference could be a
+        # remote edit just as well as a local one, so it is not ours to overwrite
+        edited_remotely = pid not in state or (r.get("updated_at") or "") > (p.get("updated_at") or "")
+        if edited_remotely and not force:
+            conflicts.append(pid)
+            continue
+        ops.append(("update", p, changed))
+
+    remote_only = sorted(set(remote) - set(local))
+    if delete:
+        for pid in remote_only:
+            ops.append(("delete", {"id": remote[pid]["id"], "paper_id": pid}, []))
+
+    return ops, conflicts, remote_only
+
+
+def build_statements(ops):
+    stmts = []
+    for op, p, cols in ops:
+        if op == "insert":
+            stmts.append(insert_sql(p))
+        elif op == "update":
+            stmts.append(update_sql(p, list(cols) + ["updated_at"]))
+    deletes = [p["id"] for op, p, _ in ops if op == "delete"]
+    for ids in chunked(deletes, BATCH_SIZE):
+        stmts.append(delete_sql(ids))
+    return stmts
+
+
+def write_sql(stmts, path):
+    with open(path, "w", encoding="utf-8") as f:
+        for batch in chunked(stmts, BATCH_SIZE):
+            f.write("BEGIN;\n")
+            for s in batch:
+                f.write(s + ";\n")
+            f.write("COMMIT;\n")
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    target = ap.add_mutually_exclusive_group(required=True)
+    target.add_argument("--json", help="JSON stand-in file for the table")
+    target.add_argument("--dsn", help="Postgres DSN for the live table")
+    ap.add_argument("--apply", action="store_true", help="apply changes (default: dry run)")
+    ap.add_argument("--delete", action="store_true", help="delete rows missing locally")
+    ap.add_argument("--force", action="store_true", help="overwrite rows edited remotely")
+    args = ap.parse_args()
+
+    with open(PAPERS_JSON) as f:
+        papers = json.load(f)
+    local = {p["paper_id"]: p for p in papers}
+
+    state = {}
+    if os.path.exists(STATE_FILE):
+        with open(STATE_FILE) as f:
+            state = json.load(f)
+
+    backend = JsonTable(args.json) if args.json else PostgresTable(args.dsn)
+    remote = backend.snapshot()
+    print(f"Local papers: {len(local)}, remote rows: {len(remote)}, sync state: {len(state)}")
+
+    ops, conflicts, remote_only = diff(local, remote, state, backend, args.force, args.delete)
+
+    # Updated rows get a fresh updated_at, mirrored back into the local JSON
+    now = datetime.now(timezone.utc).isoformat()
+    for op, p, _ in ops:
+        if op == "update":
+            p["updated_at"] = now
+
+    counts = {k: sum(1 for op, _, _ in ops if op == k) for k in ("insert", "update", "delete")}
+    print(f"  insert: {counts['insert']}, update: {counts['update']}, delete: {counts['delete']}")
+    if conflicts:
+        print(f"  CONFLICT (edited remotely, use --force): {conflicts}")
+    if remote_only and not args.delete:
+        print(f"  Remote-only (use --delete to remove): {remote_only}")
+
+    stmts = build_statements(ops)
+    write_sql(stmts, SQL_OUTPUT)
+    print(f"SQL file saved: {SQL_OUTPUT} ({len(stmts)} statements)")
+
+    if not args.apply:
+        print("\nDry run. Re-run with --apply to execute.")
+        return
+    applied = backend.apply(ops) if ops else 0
+
+    # Record state for every row now known to match on both sides, including
+    # rows that were already in sync, so the next run can skip fetching them
+    synced = set(local) - set(conflicts)
+    after = backend.snapshot()
+    for pid in synced:
+        if pid in after:
+            state[pid] = {"hash": row_hash(local[pid]), "updated_at": after[pid]["updated_at"]}
+    for pid in list(state):
+        if pid not in after:
+            del state[pid]
+    with open(STATE_FILE, "w") as f:
+        json.dump(state, f, indent=2)
+
+    if not ops:
+        pending = len(conflicts) + (0 if args.delete else len(remote_only))
+        print(f"\nNothing to apply; {pending} rows still differ (see above)." if pending
+              else "\nAlready in sync.")
+        return
+
+    with open(PAPERS_JSON, "w", encoding="utf-8") as f:
+        json.dump(papers, f, indent=2, ensure_ascii=False)
+
+    print(f"\nDone! {applied} statements applied.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Tests for the local Supabase stand-in (scripts/local_supabase.py) and the
+clients that are meant to run against it.
+
+  python3 -m pytest -q scripts/tests
+"""
+
+import base64
+import hashlib
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+requests = pytest.importorskip("requests")
+
+from local_supabase import start_server  # noqa: E402
+
+BUCKET = "paper-images"
+
+
+@pytest.fixture
+def stand_in():
+    fake, server, base_url = start_server(seed=0)
+    session = requests.Session()
+    yield fake, base_url, session
+    session.close()
+    server.shutdown()
+    server.server_close()
+
+
+def put(session, base_url, key, data, upsert=True):
+    return session.post(f"{base_url}/storage/v1/object/{BUCKET}/{key}", data=data,
+                        headers={"Content-Type": "image/webp", "x-upsert": str(upsert).lower(),
+                                 "Cache-Control": "max-age=60"})
+
+
+def test_storage_roundtrip(stand_in):
+    fake, base_url, s = stand_in
+    data = b"page bytes" * 100
+    assert put(s, base_url, "2012/page-01.webp", data).status_code == 200
+    assert put(s, base_url, "2012/page-01.webp", data, upsert=False).status_code == 400
+
+    url = f"{base_url}/storage/v1/object/public/{BUCKET}/2012/page-01.webp"
+    r = s.head(url)
+    assert r.status_code == 200
+    assert int(r.headers["Content-Length"]) == len(data)
+    assert r.headers["ETag"].strip('"') == hashlib.md5(data).hexdigest()
+    assert r.headers["Cache-Control"] == "max-age=60"
+
+    r = s.get(url, headers={"Range": "bytes=0-9"})
+    assert r.status_code == 206 and r.content == data[:10]
+    assert s.head(url.replace("page-01", "page-02")).status_code == 404
+
+
+def test_head_errors_keep_connection_usable(stand_in):
+    """Injected failures on HEAD must not write a body (keep-alive framing)."""
+    fake, base_url, s = stand_in
+    put(s, base_url, "2012/page-01.webp", b"x" * 10)
+    url = f"{base_url}/storage/v1/object/public/{BUCKET}/2012/page-01.webp"
+
+    fake.error_rate = 1.0
+    assert s.head(url).status_code == 503
+    fake.error_rate = 0.0
+    for _ in range(3):  # same pooled connection
+        assert s.head(url).status_code == 200
+        assert s.get(url).content == b"x" * 10
+
+
+def test_list_and_bulk_delete(stand_in):
+    fake, base_url, s = stand_in
+    for key in ("2012/page-01.webp", "2012/page-02.webp", "2012/page-01_files/0/0_0.webp"):
+        put(s, base_url, key, b"x")
+    r = s.post(f"{base_url}/storage/v1/object/list/{BUCKET}", json={"prefix": "2012", "limit": 100})
+    entries = {e["name"]: e["id"] for e in r.json()}
+    assert set(entries) == {"page-01.webp", "page-02.webp", "page-01_files"}
+    assert entries["page-01_files"] is None  # folder placeholder
+
+    r = s.delete(f"{base_url}/storage/v1/object/{BUCKET}",
+                 json={"prefixes": ["2012/page-02.webp", "2012/missing.webp"]})
+    assert [o["name"] for o in r.json()] == ["2012/page-02.webp"]
+    assert (BUCKET, "2012/page-02.webp") not in fake.objects
+
+
+def test_rest_insert_patch_select(stand_in):
+    fake, base_url, s = stand_in
+    rows = f"{base_url}/rest/v1/pastpaper_papers"
+    papers = [{"id": "a", "paper_id": "2012-1.1", "topic": "x"}, {"id": "b", "paper_id": "2012-1.2", "topic": "y"}]
+    assert s.post(rows, json=papers).status_code == 201
+    r = s.post(rows, json=papers[:1])
+    assert r.status_code == 409 and r.json()["code"] == "23505"
+    assert s.post(rows, json=papers[:1], headers={"Prefer": "resolution=merge-duplicates"}).status_code == 201
+
+    assert s.patch(rows, params={"id": "eq.a"}, json={"page_images": ["u"]}).status_code == 204
+    r = s.get(rows, params={"select": "paper_id,page_images", "id": "in.(a,b)"})
+    assert sorted(r.json(), key=lambda p: p["paper_id"]) == [
+        {"paper_id": "2012-1.1", "page_images": ["u"]},
+        {"paper_id": "2012-1.2", "page_images": None},
+    ]
+
+
+def test_tus_resumable_upload(stand_in):
+    fake, base_url, s = stand_in
+    tus = f"{base_url}/storage/v1/upload/resumable"
+    h = {"Tus-Resumable": "1.0.0"}
+    data = os.urandom(1000)
+    meta = ",".join(f"{k} {base64.b64encode(v.encode()).decode()}"
+                    for k, v in {"bucketName": "paper-archive", "objectName": "sources/a.pdf"}.items())
+
+    assert "concatenation" in s.options(tus, headers=h).headers["Tus-Extension"]
+    r = s.post(tus, headers={**h, "Upload-Length": str(len(data)), "Upload-Metadata": meta})
+    assert r.status_code == 201
+    url = r.headers["Location"]
+
+    patch = {**h, "Content-Type": "application/offset+octet-stream"}
+    assert s.patch(url, headers={**patch, "Upload-Offset": "0"}, data=data[:400]).status_code == 204
+    assert s.patch(url, headers={**patch, "Upload-Offset": "0"}, data=data[:400]).status_code == 409
+    offset = s.head(url, headers=h).headers["Upload-Offset"]  # resume from the server's offset
+    assert offset == "400"
+    r = s.patch(url, headers={**patch, "Upload-Offset": offset}, data=data[400:])
+    assert r.status_code == 204 and r.headers["Upload-Offset"] == str(len(data))
+    assert fake.objects[("paper-archive", "sources/a.pdf")]["data"] == data
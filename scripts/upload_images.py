@@ -2,75 +2,261 @@
 """
 Upload paper images to Supabase Storage and update page_images column.
 - service_role key bypasses RLS
-- 4 threads + retry + resume (skips already uploaded)
+- 4 threads + retry + resume: skips pages already uploaded unless the
+  file changed since (size/mtime moved and the sha256 differs, or a
+  sidecar changed), so re-rendered pages are re-sent without a requeue
+- a thumbnail per page and a per-folder manifest (sizes, hashes, variant
+  URLs) are uploaded in the same pooled pass, with long-lived
+  Cache-Control on images and a short one on the manifests; page_images
+  gets the same ?v=<hash> URLs, so a re-rendered page is a new URL
+- manifests whose content differs from the last one pushed (new pages,
+  or a failed upload) are re-sent on the next run
+- a page whose mapping entry has a "tiles" manifest (pdf_to_images.py
+  --tiles) also gets its tile pyramid uploaded next to it; the folder
+  manifest lists the tile manifest as the page's "tiles" variant
+- likewise a "vector" export (SVG/PDF smaller than the WebP, from
+  pdf_to_images.py --vector) and its "text_layer" are uploaded; the
+  manifest lists them as variants and marks the vector as "preferred"
 - tqdm progress bar
 """
 
-import json, os, time
+import argparse, hashlib, io, json, os, time
 from concurrent.futures import ThreadPoolExecutor, as_completed
-import requests
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
-from tqdm import tqdm
-
-SUPABASE_URL = os.environ.get("NEXT_PUBLIC_SUPABASE_URL", "https://wkhqphemaatzdnscnnyd.supabase.co")
-SERVICE_KEY = os.environ.get("SUPABASE_SERVICE_ROLE_KEY", "")
-if not SERVICE_KEY:
-    # Fallback: load from .env.local
-    env_path = os.path.join(os.path.dirname(__file__), "..", ".env.local")
-    if os.path.exists(env_path):
-        with open(env_path) as f:
-            for line in f:
-                if line.startswith("SUPABASE_SERVICE_ROLE_KEY="):
-                    SERVICE_KEY = line.strip().split("=", 1)[1].strip().strip('"')
-                    break
+
+import config
+from sources import in_expected_folder
+
+# requests / urllib3 / tqdm are imported where used, so importing this module
+# for its constants (verify_images.py, the dse CLI) stays cheap.
+
+SUPABASE_URL = config.get("NEXT_PUBLIC_SUPABASE_URL", "https://wkhqphemaatzdnscnnyd.supabase.co")
+SERVICE_KEY = config.get("SUPABASE_SERVICE_ROLE_KEY")
 MAPPING_FILE = "data/paper_page_mapping.json"
 IMAGES_DIR = "data/images"
 BUCKET = "paper-images"
 DONE_FILE = "data/.upload_done.json"  # resume checkpoint
+MANIFEST_DONE_FILE = "data/.upload_manifests.json"  # folder -> sha256 of the manifest last pushed
+WORKERS = 4
 
-PREFIX_TO_FOLDER = {
-    "2012sample": "2012-sample", "2012practice": "2012-practice",
-    "2012": "2012", "2013": "2013", "2014": "2014", "2015": "2015",
-    "2016": "2016", "2017": "2017", "2018": "2018", "2019": "2019",
-    "2023": "2023", "2024": "2024", "2025": "2025",
-}
+THUMB_PREFIX = "thumbs"  # thumbs/{folder}/page-NN.webp
+THUMB_WIDTH = 480
+THUMB_QUALITY = 70
+MANIFEST_PREFIX = "manifests"  # manifests/{folder}.json
+SIDECAR_KEYS = ("tiles", "vector", "text_layer")  # mapping keys naming files uploaded with their page
+VECTOR_TYPES = {"svg": "image/svg+xml", "pdf": "application/pdf"}
+# Images are addressed with ?v=<hash> (manifest and page_images), so they can be
+# cached for a year; the manifest itself is the mutable pointer and stays short-lived.
+IMAGE_CACHE_CONTROL = "max-age=31536000"
+MANIFEST_CACHE_CONTROL = "max-age=300"
 
-def expected_folder(pid):
-    for prefix, folder in sorted(PREFIX_TO_FOLDER.items(), key=lambda x: -len(x[0])):
-        if pid.startswith(prefix + "-") or pid == prefix:
-            return folder
-    return None
+def make_session(pool_size=WORKERS):
+    """Pooled, retrying session; size the pool to the number of threads sharing it."""
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
 
-def make_session():
     s = requests.Session()
     retry = Retry(total=5, backoff_factor=1, status_forcelist=[429, 500, 502, 503, 504])
-    s.mount("https://", HTTPAdapter(max_retries=retry))
+    adapter = HTTPAdapter(max_retries=retry, pool_connections=pool_size, pool_maxsize=pool_size)
+    s.mount("https://", adapter)
+    s.mount("http://", adapter)  # local stand-in (scripts/local_supabase.py)
     s.headers.update({"apikey": SERVICE_KEY, "Authorization": f"Bearer {SERVICE_KEY}"})
     return s
 
-def upload_one(session, img_rel):
-    local_path = os.path.join(IMAGES_DIR, img_rel)
-    if not os.path.exists(local_path):
-        return img_rel, None
+def public_url(path):
+    return f"{SUPABASE_URL}/storage/v1/object/public/{BUCKET}/{path}"
+
+def versioned_url(url, sha256):
+    return f"{url}?v={sha256[:12]}"
+
+def put_object(session, path, data, content_type, cache_control):
+    """Upload bytes with retry. Returns True on success."""
     for attempt in range(3):
         try:
-            with open(local_path, "rb") as f:
-                r = session.post(
-                    f"{SUPABASE_URL}/storage/v1/object/{BUCKET}/{img_rel}",
-                    headers={"Content-Type": "image/webp", "x-upsert": "true"},
-                    data=f,
-                    timeout=30,
-                )
-            if r.status_code in (200, 201):
-                return img_rel, f"{SUPABASE_URL}/storage/v1/object/public/{BUCKET}/{img_rel}"
-            else:
-                return img_rel, None
+            r = session.post(
+                f"{SUPABASE_URL}/storage/v1/object/{BUCKET}/{path}",
+                headers={"Content-Type": content_type, "x-upsert": "true",
+                         "Cache-Control": cache_control},
+                data=data,
+                timeout=30,
+            )
+            return r.status_code in (200, 201)
         except Exception:
             time.sleep(2 ** attempt)
-    return img_rel, None
+    return False
+
+def make_thumbnail(data):
+    """Return (thumb bytes, full width, full height)."""
+    from PIL import Image
+    img = Image.open(io.BytesIO(data))
+    width, height = img.size
+    thumb = img.copy()
+    thumb.thumbnail((THUMB_WIDTH, THUMB_WIDTH * height // width + 1))
+    out = io.BytesIO()
+    thumb.save(out, "WEBP", quality=THUMB_QUALITY)
+    return out.getvalue(), width, height
+
+def upload_tiles(session, tiles_rel):
+    """
+    Upload a tile pyramid ({stem}_files/...) and its .tiles.json. The tile
+    path template in the uploaded manifest gets ?v=<hash of the pyramid>,
+    so re-cut tiles are new URLs. Returns a dict for the page info or None.
+    """
+    with open(os.path.join(IMAGES_DIR, tiles_rel), "rb") as f:
+        manifest = json.load(f)
+    tiles_dir = tiles_rel[:-len(".tiles.json")] + "_files"
+    paths = []
+    for root, _, names in os.walk(os.path.join(IMAGES_DIR, tiles_dir)):
+        paths += [os.path.join(root, n) for n in names]
+
+    digest = hashlib.sha256(json.dumps(manifest, sort_keys=True).encode("utf-8"))
+    tiles = []
+    for path in sorted(paths):
+        rel = os.path.relpath(path, IMAGES_DIR).replace(os.sep, "/")
+        with open(path, "rb") as f:
+            data = f.read()
+        digest.update(rel.encode("utf-8"))
+        digest.update(data)
+        tiles.append((rel, data))
+    sha256 = digest.hexdigest()
+
+    for rel, data in tiles:
+        if not put_object(session, rel, data, "image/webp", IMAGE_CACHE_CONTROL):
+            return None
+    manifest["tiles"] = versioned_url(manifest["tiles"], sha256)
+    body = json.dumps(manifest, separators=(",", ":")).encode("utf-8")
+    if not put_object(session, tiles_rel, body, "application/json", IMAGE_CACHE_CONTROL):
+        return None
+    return {"tiles_url": public_url(tiles_rel), "tiles_sha256": sha256,
+            "tiles_bytes": len(body) + sum(len(d) for _, d in tiles)}
+
+def upload_file(session, rel, content_type):
+    """Upload one sidecar file. Returns (public url, sha256, bytes) or None."""
+    with open(os.path.join(IMAGES_DIR, rel), "rb") as f:
+        data = f.read()
+    if not put_object(session, rel, data, content_type, IMAGE_CACHE_CONTROL):
+        return None
+    return public_url(rel), hashlib.sha256(data).hexdigest(), len(data)
+
+def file_stamp(rel):
+    """[size, mtime_ns] of a file under IMAGES_DIR, or None if it is gone."""
+    path = os.path.join(IMAGES_DIR, rel)
+    if not os.path.exists(path):
+        return None
+    st = os.stat(path)
+    return [st.st_size, st.st_mtime_ns]
+
+def needs_upload(img_rel, entry, sidecars):
+    """
+    True if the page was never uploaded or its files changed since. The
+    page is only re-hashed when its size/mtime moved; if the hash still
+    matches, the entry's stamps are refreshed in place instead.
+    """
+    if entry is None or entry.get("sidecars", {}) != sidecars:
+        return True
+    if file_stamp(img_rel) is None:
+        return False  # nothing to upload; counted as failed if never done
+    stamps = {rel: file_stamp(rel) for rel in [img_rel, *sidecars.values()]}
+    recorded = entry.get("stamps", {})
+    if stamps == recorded:
+        return False
+    if any(recorded.get(rel) != stamp for rel, stamp in stamps.items() if rel != img_rel):
+        return True
+    with open(os.path.join(IMAGES_DIR, img_rel), "rb") as f:
+        if hashlib.sha256(f.read()).hexdigest() != entry["sha256"]:
+            return True
+    entry["stamps"] = stamps
+    return False
+
+def upload_one(session, img_rel, sidecars=None):
+    """
+    Upload a page, its thumbnail and its sidecars (SIDECAR_KEYS from the
+    mapping entry). Returns (img_rel, info dict or None).
+    """
+    sidecars = sidecars or {}
+    local_path = os.path.join(IMAGES_DIR, img_rel)
+    if not os.path.exists(local_path):
+        return img_rel, None
+    with open(local_path, "rb") as f:
+        data = f.read()
+    stamps = {rel: file_stamp(rel) for rel in [img_rel, *sidecars.values()]}
+    thumb, width, height = make_thumbnail(data)
+    thumb_rel = f"{THUMB_PREFIX}/{img_rel}"
+    if not put_object(session, img_rel, data, "image/webp", IMAGE_CACHE_CONTROL):
+        return img_rel, None
+    if not put_object(session, thumb_rel, thumb, "image/webp", IMAGE_CACHE_CONTROL):
+        return img_rel, None
+    info = {
+        "url": public_url(img_rel),
+        "thumb_url": public_url(thumb_rel),
+        "bytes": len(data),
+        "thumb_bytes": len(thumb),
+        "sha256": hashlib.sha256(data).hexdigest(),
+        "width": width,
+        "height": height,
+        "sidecars": sidecars,
+        "stamps": stamps,
+    }
+    if "tiles" in sidecars:
+        tiles = upload_tiles(session, sidecars["tiles"])
+        if tiles is None:
+            return img_rel, None
+        info.update(tiles)
+    if "vector" in sidecars:
+        ext = sidecars["vector"].rsplit(".", 1)[1]
+        vector = upload_file(session, sidecars["vector"], VECTOR_TYPES[ext])
+        if vector is None:
+            return img_rel, None
+        info["vector_url"], info["vector_sha256"], info["vector_bytes"] = vector
+        info["vector_type"] = VECTOR_TYPES[ext]
+    if "text_layer" in sidecars:
+        text = upload_file(session, sidecars["text_layer"], "application/json")
+        if text is None:
+            return img_rel, None
+        info["text_url"], info["text_sha256"], info["text_bytes"] = text
+    return img_rel, info
+
+def build_manifest(folder, images, done):
+    """Per-folder manifest: sizes, hashes and cache-busted variant URLs."""
+    pages = []
+    for img in images:
+        info = done[img]
+        variants = {
+            "full": {"url": versioned_url(info["url"], info["sha256"]), "bytes": info["bytes"], "width": info["width"]},
+            "thumb": {"url": versioned_url(info["thumb_url"], info["sha256"]), "bytes": info["thumb_bytes"],
+                      "width": min(THUMB_WIDTH, info["width"])},
+        }
+        if "tiles_url" in info:
+            variants["tiles"] = {"url": versioned_url(info["tiles_url"], info["tiles_sha256"]),
+                                 "bytes": info["tiles_bytes"]}
+        if "vector_url" in info:
+            variants["vector"] = {"url": versioned_url(info["vector_url"], info["vector_sha256"]),
+                                  "bytes": info["vector_bytes"], "type": info["vector_type"]}
+        if "text_url" in info:
+            variants["text"] = {"url": versioned_url(info["text_url"], info["text_sha256"]),
+                                "bytes": info["text_bytes"]}
+        pages.append({
+            "name": img.split("/", 1)[1],
+            "width": info["width"],
+            "height": info["height"],
+            "sha256": info["sha256"],
+            "preferred": "vector" if "vector" in variants else "full",
+            "variants": variants,
+        })
+    return {"folder": folder, "pages": pages}
+
+def manifest_body(manifest):
+    return json.dumps(manifest, separators=(",", ":")).encode("utf-8")
+
+def upload_manifest(session, folder, body):
+    path = f"{MANIFEST_PREFIX}/{folder}.json"
+    return folder, put_object(session, path, body, "application/json", MANIFEST_CACHE_CONTROL)
 
 def main():
+    argparse.ArgumentParser(description="Upload page images, thumbnails and manifests to Supabase Storage").parse_args()
+    import requests
+    from tqdm import tqdm
+
     if not SERVICE_KEY:
         print("ERROR: Set SUPABASE_SERVICE_ROLE_KEY in .env.local or env")
         return
@@ -78,11 +264,12 @@ def main():
         mapping = json.load(f)
 
     by_pid = {}
+    sidecars = {}
     for e in mapping:
         pid, img = e["paper_id"], e["image"]
-        folder = expected_folder(pid)
-        if folder and not img.startswith(folder + "/"):
+        if not in_expected_folder(pid, img):
             continue
+        sidecars[img] = {k: e[k] for k in SIDECAR_KEYS if k in e}
         if pid not in by_pid:
             by_pid[pid] = {"db_id": e["db_id"], "images": []}
         if img not in by_pid[pid]["images"]:
@@ -90,33 +277,60 @@ def main():
 
     all_images = sorted({img for d in by_pid.values() for img in d["images"]})
 
-    # Load checkpoint
+    # Load checkpoint (older checkpoints stored a bare URL: redo those for thumbs/metadata)
     done = {}
     if os.path.exists(DONE_FILE):
         with open(DONE_FILE) as f:
-            done = json.load(f)
-    todo = [img for img in all_images if img not in done]
-    print(f"\n=== {len(all_images)} total, {len(done)} already done, {len(todo)} to upload ===\n")
-
-    if todo:
-        session = make_session()
-        with ThreadPoolExecutor(max_workers=4) as pool:
-            futures = {pool.submit(upload_one, session, img): img for img in todo}
+            done = {k: v for k, v in json.load(f).items() if isinstance(v, dict)}
+    # Re-rendered pages and changed sidecars (e.g. newly rendered tiles) go again
+    todo = [img for img in all_images if needs_upload(img, done.get(img), sidecars[img])]
+    print(f"\n=== {len(all_images)} total, {len(all_images) - len(todo)} up to date, {len(todo)} to upload ===\n")
+
+    by_folder = {}
+    for img in all_images:
+        by_folder.setdefault(img.split("/", 1)[0], []).append(img)
+    pushed = {}
+    if os.path.exists(MANIFEST_DONE_FILE):
+        with open(MANIFEST_DONE_FILE) as f:
+            pushed = json.load(f)
+
+    session = make_session()
+    manifests_ok = 0
+    with ThreadPoolExecutor(max_workers=WORKERS) as pool:
+        if todo:
+            futures = {pool.submit(upload_one, session, img, sidecars[img]): img for img in todo}
             for future in tqdm(as_completed(futures), total=len(futures), desc="Uploading", unit="img", ncols=80):
-                img_rel, url = future.result()
-                if url:
-                    done[img_rel] = url
+                img_rel, info = future.result()
+                if info:
+                    done[img_rel] = info
                     # Save checkpoint every 10
                     if len(done) % 10 == 0:
                         with open(DONE_FILE, "w") as f:
                             json.dump(done, f)
-        # Final save
+        # Final save (also keeps stamps refreshed by needs_upload)
         with open(DONE_FILE, "w") as f:
             json.dump(done, f)
 
+        # Manifests that differ from the last successful push, on the same pool and session
+        bodies = {folder: manifest_body(build_manifest(folder, [i for i in imgs if i in done], done))
+                  for folder, imgs in sorted(by_folder.items())}
+        hashes = {folder: hashlib.sha256(body).hexdigest() for folder, body in bodies.items()}
+        stale = [folder for folder in bodies if pushed.get(folder) != hashes[folder]]
+        futures = [pool.submit(upload_manifest, session, folder, bodies[folder]) for folder in stale]
+        for future in as_completed(futures):
+            folder, ok = future.result()
+            manifests_ok += ok
+            if ok:
+                pushed[folder] = hashes[folder]
+            else:
+                print(f"  Manifest upload failed: {folder} (retried next run)")
+    if stale:
+        with open(MANIFEST_DONE_FILE, "w") as f:
+            json.dump(pushed, f, indent=1)
+
     ok = sum(1 for img in all_images if img in done)
     fail = len(all_images) - ok
-    print(f"\nUpload: {ok} ok, {fail} failed")
+    print(f"\nUpload: {ok} ok, {fail} failed, {manifests_ok}/{len(stale)} manifests")
 
     # Update DB
     headers = {
@@ -126,8 +340,9 @@ def main():
         "Prefer": "return=minimal",
     }
     updated = 0
+    failed = []
     for pid, data in tqdm(by_pid.items(), desc="Updating DB", unit="paper", ncols=80):
-        urls = [done[img] for img in data["images"] if img in done]
+        urls = [versioned_url(done[img]["url"], done[img]["sha256"]) for img in data["images"] if img in done]
         if not urls:
             continue
         try:
@@ -137,10 +352,16 @@ def main():
             )
             if r.status_code in (200, 204):
                 updated += 1
-        except Exception:
-            pass
+            else:
+                failed.append(f"{pid}: HTTP {r.status_code}")
+        except Exception as e:
+            failed.append(f"{pid}: {e}")
 
     print(f"\nDone! {updated} papers updated with Storage URLs.\n")
+    if failed:
+        print(f"{len(failed)} page_images updates failed (run verify_images.py to check):")
+        for msg in failed:
+            print(f"  {msg}")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Verify that every published page_images URL serves the right bytes.
+- reads page_images from the DB (PostgREST) or a local rows JSON
+- concurrent HEAD over a pooled session; size + ETag (MD5) compared with
+  the local file, falling back to a ranged GET when there is no usable ETag
+- --full downloads each object and compares SHA-256
+- writes missing/stale images to a re-upload queue; --requeue also drops
+  them from upload_images.py's checkpoint so the next upload redoes them
+
+  python3 scripts/verify_images.py
+  python3 scripts/verify_images.py --rows data/rows.json --base-url http://localhost:3000
+  NEXT_PUBLIC_SUPABASE_URL=http://127.0.0.1:54321 python3 scripts/verify_images.py --requeue
+"""
+
+import argparse
+import hashlib
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlparse, unquote
+
+from upload_images import BUCKET, DONE_FILE, IMAGES_DIR, SUPABASE_URL, WORKERS, make_session
+
+QUEUE_FILE = "data/reupload_queue.json"
+RANGE_BYTES = 64 * 1024  # prefix compared when the ETag can't be used
+PUBLIC_PREFIXES = [f"/storage/v1/object/public/{BUCKET}/", "/paper-images/"]
+
+
+def image_rel(url):
+    """Map a page_images URL back to its path under IMAGES_DIR."""
+    path = unquote(urlparse(url).path)
+    for prefix in PUBLIC_PREFIXES:
+        if prefix in path:
+            return path.split(prefix, 1)[1]
+    return None
+
+
+def local_info(img_rel):
+    path = os.path.join(IMAGES_DIR, img_rel)
+    if not os.path.exists(path):
+        return None
+    with open(path, "rb") as f:
+        data = f.read()
+    return {
+        "bytes": len(data),
+        "md5": hashlib.md5(data).hexdigest(),
+        "sha256": hashlib.sha256(data).hexdigest(),
+        "prefix": data[:RANGE_BYTES],
+    }
+
+
+def check(session, url, local, full):
+    """Return (status, detail). status: ok | missing | stale | error."""
+    try:
+        if full:
+            r = session.get(url, timeout=30)
+            if r.status_code == 404:
+                return "missing", "404"
+            if r.status_code != 200:
+                return "error", f"HTTP {r.status_code}"
+            if hashlib.sha256(r.content).hexdigest() != local["sha256"]:
+                return "stale", "sha256 differs"
+            return "ok", ""
+
+        r = session.head(url, timeout=15)
+        if r.status_code in (400, 404):
+            return "missing", str(r.status_code)
+        if r.status_code != 200:
+            return "error", f"HTTP {r.status_code}"
+        size = r.headers.get("Content-Length")
+        if size is not None and int(size) != local["bytes"]:
+            return "stale", f"size {size} != {local['bytes']}"
+        etag = r.headers.get("ETag", "").strip('"').removeprefix("W/").strip('"')
+        if len(etag) == 32 and "-" not in etag:
+            return ("ok", "") if etag == local["md5"] else ("stale", "etag differs")
+
+        # No plain MD5 ETag (multipart upload or CDN): compare the first bytes
+        r = session.get(url, headers={"Range": f"bytes=0-{RANGE_BYTES - 1}"}, timeout=15)
+        if r.status_code not in (200, 206):
+            return "error", f"range HTTP {r.status_code}"
+        if r.content[:RANGE_BYTES] != local["prefix"]:
+            return "stale", "content prefix differs"
+        return "ok", ""
+    except Exception as e:
+        return "error", str(e)
+
+
+def load_rows(rows_file, session):
+    if rows_file:
+        with open(rows_file) as f:
+            return json.load(f)
+    r = session.get(
+        f"{SUPABASE_URL}/rest/v1/pastpaper_papers",
+        params={"select": "id,paper_id,page_images"}, timeout=30,
+    )
+    r.raise_for_status()
+    return r.json()
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Verify published page_images against local files")
+    ap.add_argument("--rows", help="JSON list of rows with page_images (default: fetch from DB)")
+    ap.add_argument("--base-url", default="http://localhost:3000", help="origin for relative URLs")
+    ap.add_argument("--full", action="store_true", help="download and hash every object")
+    ap.add_argument("--workers", type=int, default=WORKERS * 2)
+    ap.add_argument("--requeue", action="store_true", help="drop bad images from the upload checkpoint")
+    args = ap.parse_args()
+
+    session = make_session(pool_size=args.workers)
+    rows = load_rows(args.rows, session)
+
+    jobs = {}  # url -> (paper_id, img_rel)
+    unmapped = []
+    for row in rows:
+        for url in row.get("page_images") or []:
+            abs_url = args.base_url.rstrip("/") + url if url.startswith("/") else url
+            rel = image_rel(abs_url)
+            if rel is None:
+                unmapped.append(url)
+            else:
+                jobs[abs_url] = (row["paper_id"], rel)
+    print(f"{len(rows)} papers, {len(jobs)} URLs to verify")
+
+    results = {"ok": [], "missing": [], "stale": [], "error": []}
+    no_local = []
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        futures = {}
+        for url, (pid, rel) in jobs.items():
+            local = local_info(rel)
+            if local is None:
+                no_local.append(rel)
+                continue
+            futures[pool.submit(check, session, url, local, args.full)] = (url, pid, rel)
+        for future in as_completed(futures):
+            url, pid, rel = futures[future]
+            status, detail = future.result()
+            results[status].append({"paper_id": pid, "image": rel, "url": url, "detail": detail})
+
+    print(f"\nVerified: {len(results['ok'])} ok, {len(results['missing'])} missing, "
+          f"{len(results['stale'])} stale, {len(results['error'])} errors")
+    for status in ("missing", "stale", "error"):
+        for item in sorted(results[status], key=lambda x: x["image"]):
+            print(f"  {status.upper():<7} {item['paper_id']:<16} {item['image']}  {item['detail']}")
+    if no_local:
+        print(f"  No local file for {len(no_local)} images (can't verify): {sorted(no_local)[:10]}")
+    if unmapped:
+        print(f"  Unrecognised URLs: {unmapped[:10]}")
+
+    queue = sorted({item["image"] for s in ("missing", "stale") for item in results[s]})
+    with open(QUEUE_FILE, "w") as f:
+        json.dump(queue, f, indent=2)
+    print(f"\nRe-upload queue: {QUEUE_FILE} ({len(queue)} images)")
+
+    if args.requeue and queue and os.path.exists(DONE_FILE):
+        with open(DONE_FILE) as f:
+            done = json.load(f)
+        for img in queue:
+            done.pop(img, None)
+        with open(DONE_FILE, "w") as f:
+            json.dump(done, f)
+        print(f"Removed {len(queue)} entries from {DONE_FILE}; re-run upload_images.py.")
+
+
+if __name__ == "__main__":
+    main()
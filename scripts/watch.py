@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Watch the PDF directory and addpp.md and rebuild outputs as they change.
+- polls mtimes/sizes (no extra dependencies) and debounces bursts of writes
+- re-renders only the PDF pages whose content fingerprint changed
+- re-imports addpp.md when it changes
+- then refreshes the mapping, the HTML preview and page_images SQL for
+  the affected papers
+
+  python3 scripts/watch.py            # keep watching
+  python3 scripts/watch.py --once     # catch up on changes since last run and exit
+"""
+
+import argparse
+import json
+import os
+import time
+
+import generate_mapping
+import import_new_papers
+import pdf_to_images
+import preview_mapping
+import update_page_images_sql
+from pdf_to_images import PDF_DIR, PDF_RULES, OUTPUT_DIR, kept_pages
+from raster_cache import RasterCache, page_fingerprint
+
+ADDPP_FILE = import_new_papers.ADDPP_FILE
+# pdf -> {mtime_ns, size, pages: {page_num: fingerprint}}, "__addpp__" -> [mtime_ns, size]
+STATE_FILE = "data/.watch_state.json"
+SQL_OUTPUT = "data/watch_update_page_images.sql"
+
+POLL_INTERVAL = 1.0  # seconds
+DEBOUNCE = 2.0  # seconds of quiet before rebuilding
+
+
+def snapshot():
+    """Return {path: (mtime_ns, size)} for watched files."""
+    files = {}
+    if os.path.isdir(PDF_DIR):
+        with os.scandir(PDF_DIR) as it:
+            for e in it:
+                if e.is_file() and e.name.lower().endswith(".pdf"):
+                    st = e.stat()
+                    files[e.path] = (st.st_mtime_ns, st.st_size)
+    if os.path.exists(ADDPP_FILE):
+        st = os.stat(ADDPP_FILE)
+        files[ADDPP_FILE] = (st.st_mtime_ns, st.st_size)
+    return files
+
+
+def load_state():
+    if os.path.exists(STATE_FILE):
+        with open(STATE_FILE) as f:
+            return json.load(f)
+    return {}
+
+
+def save_state(state):
+    with open(STATE_FILE, "w") as f:
+        json.dump(state, f, indent=2)
+
+
+def recorded(state, path):
+    """(mtime_ns, size) of a file as of the last rebuild, or None."""
+    if path == ADDPP_FILE:
+        sig = state.get("__addpp__")
+        return tuple(sig) if sig else None
+    entry = state.get(os.path.basename(path))
+    return (entry["mtime_ns"], entry["size"]) if entry else None
+
+
+def render_changed(pdf_name, state, tiles, vector, crop):
+    """Re-render pages of one PDF whose fingerprint changed. Returns changed image paths."""
+    import fitz  # pymupdf
+
+    rule = PDF_RULES[pdf_name]
+    pdf_path = os.path.join(PDF_DIR, pdf_name)
+    doc = fitz.open(pdf_path)
+    old = state.get(pdf_name, {}).get("pages", {})
+    fingerprints, changed = {}, set()
+    for page_num, img_index in kept_pages(len(doc), rule["pages"]):
+        fp = page_fingerprint(doc[page_num])
+        fingerprints[str(page_num)] = fp
+        out_file = os.path.join(OUTPUT_DIR, rule["key"], f"page-{img_index:02d}.webp")
+        if old.get(str(page_num)) != fp or not os.path.exists(out_file):
+            changed.add(page_num)
+    doc.close()
+
+    results = []
+    if changed:
+        results = pdf_to_images.convert_pdf(
+            pdf_path, rule["key"], rule["pages"], tiles=tiles, vector=vector, only=changed, crop=crop,
+        )
+        pdf_to_images.save_crop_boxes(results)
+    st = os.stat(pdf_path)
+    state[pdf_name] = {"mtime_ns": st.st_mtime_ns, "size": st.st_size, "pages": fingerprints}
+    print(f"  {pdf_name}: {len(changed)}/{len(fingerprints)} pages re-rendered")
+    return [r["image"] for r in results]
+
+
+def rebuild(paths, state, tiles, vector, crop):
+    t0 = time.perf_counter()
+    images, added = [], []
+
+    for path in sorted(paths):
+        if path == ADDPP_FILE:
+            print(f"  {os.path.basename(ADDPP_FILE)} changed: importing")
+            new = import_new_papers.main([])
+            if new is None:  # failed validation: leave it pending for the next run
+                print(f"  {os.path.basename(ADDPP_FILE)}: import failed, not recorded")
+                continue
+            st = os.stat(ADDPP_FILE)
+            state["__addpp__"] = [st.st_mtime_ns, st.st_size]
+            added += new
+            continue
+        name = os.path.basename(path)
+        if name not in PDF_RULES:
+            print(f"  {name}: no PDF_RULES entry, skipped (add a source to sources.py)")
+            continue
+        if not os.path.exists(path):
+            print(f"  {name}: removed")
+            state.pop(name, None)
+            continue
+        images += render_changed(name, state, tiles, vector, crop)
+    save_state(state)
+
+    if not images and not added:
+        print(f"  nothing to refresh ({time.perf_counter() - t0:.1f}s)")
+        return
+
+    generate_mapping.main()
+    preview_mapping.main()
+
+    with open(generate_mapping.OUTPUT) as f:
+        mapping = json.load(f)
+    changed = set(images)
+    affected = {e["paper_id"] for e in mapping if e["image"] in changed} | set(added)
+    stmts = update_page_images_sql.build_statements(mapping, only=affected)
+    with open(SQL_OUTPUT, "w", encoding="utf-8") as f:
+        f.write("\n".join(stmts) + "\n")
+    print(f"\nRefreshed {len(images)} images, {len(affected)} papers in "
+          f"{time.perf_counter() - t0:.1f}s. SQL: {SQL_OUTPUT} ({len(stmts)} statements)")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Rebuild images and mappings as PDFs arrive")
+    ap.add_argument("--once", action="store_true", help="process pending changes and exit")
+    ap.add_argument("--tiles", action="store_true", help="also render tile pyramids")
+    ap.add_argument("--vector", action="store_true", help="also export vector pages")
+    ap.add_argument("--crop", action="store_true", help="crop pages to their content")
+    args = ap.parse_args()
+
+    pdf_to_images.raster_cache = RasterCache()
+    state = load_state()
+
+    # Anything that differs from the recorded state counts as changed at startup
+    seen = snapshot()
+    pending = {p for p, sig in seen.items() if recorded(state, p) != sig}
+    last_change = time.monotonic() - DEBOUNCE
+    print(f"Watching {PDF_DIR} and {ADDPP_FILE} ({len(pending)} pending changes)")
+
+    while True:
+        if pending and time.monotonic() - last_change >= DEBOUNCE:
+            print(f"\n[{time.strftime('%H:%M:%S')}] {len(pending)} changed file(s)")
+            rebuild(pending, state, args.tiles, args.vector, args.crop)
+            pending = set()
+        if args.once and not pending:
+            return
+
+        time.sleep(POLL_INTERVAL)
+        current = snapshot()
+        changed = {p for p in set(current) | set(seen) if current.get(p) != seen.get(p)}
+        if changed:
+            pending |= changed
+            last_change = time.monotonic()
+        seen = current
+
+
+if __name__ == "__main__":
+    main()